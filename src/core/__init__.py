@@ -7,6 +7,7 @@ from src.core.protocol import (
     ConfigSubtype,
     PacketHeader,
     parse_header,
+    parse_header_from,
     create_header,
     CHALLENGE_SIZE,
     SIGNATURE_SIZE,
@@ -20,6 +21,7 @@ __all__ = [
     'ConfigSubtype',
     'PacketHeader',
     'parse_header',
+    'parse_header_from',
     'create_header',
     'CHALLENGE_SIZE',
     'SIGNATURE_SIZE',
@@ -0,0 +1,149 @@
+"""
+CPU pinning for the streaming threads (Linux only).
+
+The receive thread is pinned to the CPU that services the USB host
+controller (xHCI) interrupt, and the decoder threads to other cores that
+share its L3 cache, so packet data is parsed and decoded where the IRQ
+left it. Where the IRQ CPU cannot be found (other platforms, containers
+without xHCI entries) threads are left unpinned.
+
+Threads inherit the mask of the thread that creates them, so helper
+threads started by a pinned thread would all share its single core. The
+process mask is captured at import, before anything is pinned, and code
+that starts helper threads from a pinned thread (the PyAV codec and
+hardware device open, with their FFmpeg worker threads) runs inside
+unpinned(), which restores that mask for the duration. The USB device,
+and with it libusb's event thread, is opened by the connect worker,
+which is never pinned.
+
+Environment override:
+    WOLFKRYPT_CPU_AFFINITY=0   (never pin)
+"""
+
+import contextlib
+import functools
+import os
+from typing import List, Optional, Set
+
+RECEIVE = 'receive'
+VIDEO = 'video'
+AUDIO = 'audio'
+
+_CPU_SYSFS = '/sys/devices/system/cpu/cpu{}/{}'
+
+# Allowed CPUs of the process, read before any thread is pinned
+_PROCESS_CPUS = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None
+
+
+def _parse_cpu_list(text: str) -> Set[int]:
+    """Parse a sysfs CPU list such as '0-3,8-11'."""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _read_cpu_list(cpu: int, name: str) -> Set[int]:
+    try:
+        with open(_CPU_SYSFS.format(cpu, name)) as f:
+            return _parse_cpu_list(f.read())
+    except (OSError, ValueError):
+        return set()
+
+
+@functools.lru_cache(maxsize=1)
+def usb_irq_cpu() -> Optional[int]:
+    """Return the allowed CPU that has serviced the most xHCI interrupts, or None."""
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    try:
+        with open('/proc/interrupts') as f:
+            cpus = [int(name[3:]) for name in f.readline().split()]
+            counts = [0] * len(cpus)
+            for line in f:
+                if 'xhci' not in line:
+                    continue
+                for index, field in enumerate(line.split()[1:1 + len(cpus)]):
+                    if field.isdigit():
+                        counts[index] += int(field)
+    except (OSError, ValueError):
+        return None
+
+    allowed = os.sched_getaffinity(0)
+    best = max(
+        (index for index in range(len(cpus)) if cpus[index] in allowed),
+        key=counts.__getitem__,
+        default=None
+    )
+    if best is None or not counts[best]:
+        return None
+    return cpus[best]
+
+
+@functools.lru_cache(maxsize=1)
+def _decoder_cpus() -> List[int]:
+    """Cores sharing the IRQ CPU's L3 cache, excluding the IRQ core itself."""
+    irq_cpu = usb_irq_cpu()
+    if irq_cpu is None:
+        return []
+    shared = _read_cpu_list(irq_cpu, 'cache/index3/shared_cpu_list')
+    # Hyper-threads of the IRQ core would compete with the receive thread
+    busy = _read_cpu_list(irq_cpu, 'topology/thread_siblings_list') | {irq_cpu}
+    return sorted((shared - busy) & os.sched_getaffinity(0))
+
+
+def pin_current_thread(role: str) -> Optional[int]:
+    """
+    Pin the calling thread according to its role.
+
+    Args:
+        role: RECEIVE, VIDEO or AUDIO.
+
+    Returns:
+        The CPU the thread was pinned to, or None if it was left unpinned.
+    """
+    if os.environ.get('WOLFKRYPT_CPU_AFFINITY') == '0':
+        return None
+
+    if role == RECEIVE:
+        cpu = usb_irq_cpu()
+    else:
+        candidates = _decoder_cpus()
+        index = 1 if role == AUDIO else 0
+        cpu = candidates[min(index, len(candidates) - 1)] if candidates else None
+    if cpu is None:
+        return None
+
+    try:
+        # pid 0 is the calling thread, not the whole process
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print(f"[Affinity] Could not pin {role} thread: {e}")
+        return None
+    print(f"[Affinity] {role} thread -> CPU {cpu}")
+    return cpu
+
+
+@contextlib.contextmanager
+def unpinned():
+    """Run the block with the calling thread's full process CPU mask restored."""
+    pinned = None
+    if _PROCESS_CPUS:
+        try:
+            current = os.sched_getaffinity(0)
+            if current != _PROCESS_CPUS:
+                os.sched_setaffinity(0, _PROCESS_CPUS)
+                pinned = current
+        except OSError:
+            pass
+    try:
+        yield
+    finally:
+        if pinned is not None:
+            try:
+                os.sched_setaffinity(0, pinned)
+            except OSError:
+                pass
@@ -3,6 +3,7 @@ AOA (Android Open Accessory) 2.0 USB host implementation.
 Uses PyUSB for direct USB communication.
 """
 
+import array
 import sys
 import time
 from typing import Callable, Optional
@@ -18,7 +19,7 @@ try:
 except ImportError:
     pass
 
-from src.core.protocol import USB_TIMEOUT_MS
+from src.core.protocol import HEADER_STRUCT, HEADER_TOTAL_SIZE, USB_TIMEOUT_MS
 
 
 # AOA Protocol Constants
@@ -49,6 +50,7 @@ class AoaHost:
         self._endpoint_out: Optional[usb.core.Endpoint] = None
         self._connected = False
         self._interface = 0
+        self._read_buffer: Optional[array.array] = None  # Reused by read_into()
         self.last_error = ""
         self._status_callback: Optional[Callable[[str], None]] = None
     
@@ -144,6 +146,18 @@ class AoaHost:
             self._set_error(f"USB write error: {e}")
             return False
     
+    def write_packet(self, packet_type: int, payload: bytes) -> bool:
+        """
+        Write one protocol packet (header + payload) as a single bulk transfer.
+        
+        The header is packed straight into the packet buffer, so no separate
+        header bytes object is built and concatenated.
+        """
+        packet = bytearray(HEADER_TOTAL_SIZE + len(payload))
+        HEADER_STRUCT.pack_into(packet, 0, packet_type, len(payload))
+        packet[HEADER_TOTAL_SIZE:] = payload
+        return self.write(packet)
+    
     def read(self, max_length: int, timeout_ms: int = USB_TIMEOUT_MS) -> Optional[bytes]:
         """Read data from the device."""
         if not self._connected or not self._endpoint_in:
@@ -158,6 +172,36 @@ class AoaHost:
             self._set_error(f"USB read error: {e}")
             return None
     
+    def read_into(self, buffer: memoryview, timeout_ms: int = USB_TIMEOUT_MS) -> Optional[int]:
+        """
+        Read up to len(buffer) bytes from the device into buffer.
+        
+        PyUSB only reads into array.array objects, so the transfer lands in
+        an array kept by this host and is copied into buffer once, instead of
+        allocating a new array and a new bytes object on every read.
+        
+        Returns:
+            Number of bytes read (0 on timeout), or None on error.
+        """
+        if not self._connected or not self._endpoint_in:
+            return None
+        
+        size = len(buffer)
+        read_buffer = self._read_buffer
+        if read_buffer is None or len(read_buffer) != size:
+            read_buffer = self._read_buffer = array.array('B', bytes(size))
+        
+        try:
+            count = self._endpoint_in.read(read_buffer, timeout=timeout_ms)
+        except usb.core.USBTimeoutError:
+            return 0  # Timeout is not an error
+        except usb.core.USBError as e:
+            self._set_error(f"USB read error: {e}")
+            return None
+        
+        buffer[:count] = memoryview(read_buffer)[:count]
+        return count
+    
     def _find_android_device(self) -> Optional[usb.core.Device]:
         """Find an Android device that supports AOA."""
         devices = usb.core.find(find_all=True, backend=_backend)
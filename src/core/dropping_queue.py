@@ -8,7 +8,8 @@ latency accumulation from buffering.
 """
 
 import threading
-from typing import Generic, Optional, TypeVar
+from collections import deque
+from typing import Callable, Generic, Optional, TypeVar
 
 T = TypeVar('T')
 
@@ -37,7 +38,7 @@ class DroppingQueue(Generic[T]):
             raise ValueError("maxsize must be at least 1")
         
         self._maxsize = maxsize
-        self._items: list = []
+        self._items: deque = deque(maxlen=maxsize)  # Evicts oldest on append when full
         self._lock = threading.Lock()
         self._not_empty = threading.Condition(self._lock)
     
@@ -55,22 +56,20 @@ class DroppingQueue(Generic[T]):
         Returns:
             True if an item was dropped, False otherwise.
         """
-        dropped = False
         with self._lock:
-            if len(self._items) >= self._maxsize:
-                # Drop oldest item(s) to make room
-                self._items.pop(0)
-                dropped = True
+            # Bounded deque drops the oldest item to make room
+            dropped = len(self._items) >= self._maxsize
             self._items.append(item)
             self._not_empty.notify()
         return dropped
     
-    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+    def get(self, timeout: Optional[float] = None, block: bool = False) -> Optional[T]:
         """
         Get an item from the queue.
         
         Args:
             timeout: Maximum time to wait in seconds. None for non-blocking.
+            block: If True and timeout is None, wait until an item arrives.
             
         Returns:
             The item, or None if queue is empty (non-blocking) or timeout.
@@ -78,12 +77,16 @@ class DroppingQueue(Generic[T]):
         with self._not_empty:
             if not self._items:
                 if timeout is None:
-                    return None
+                    if not block:
+                        return None
+                    while not self._items:
+                        self._not_empty.wait()
+                    return self._items.popleft()
                 # Wait for item with timeout
                 self._not_empty.wait(timeout)
                 if not self._items:
                     return None
-            return self._items.pop(0)
+            return self._items.popleft()
     
     def get_nowait(self) -> Optional[T]:
         """
@@ -94,6 +97,24 @@ class DroppingQueue(Generic[T]):
         """
         return self.get(timeout=None)
     
+    def discard_before(self, predicate: Callable[[T], bool]) -> bool:
+        """
+        Drop the items queued ahead of the first one matching predicate.
+        
+        The matching item stays at the head. If nothing matches, the queue
+        is left untouched.
+        
+        Returns:
+            True if a matching item was found.
+        """
+        with self._lock:
+            for index, item in enumerate(self._items):
+                if predicate(item):
+                    for _ in range(index):
+                        self._items.popleft()
+                    return True
+        return False
+    
     def clear(self):
         """Clear all items from the queue."""
         with self._lock:
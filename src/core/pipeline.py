@@ -9,30 +9,42 @@ Stage A (USB Pump Thread):
     - Immediately handles auth packets (high priority)
     - Queues video/audio for processing
 
-Stage B (Decoder Thread):
+Stage B (Decoder Threads):
     - Consumes video packets from queue
     - Decodes using PyAV (hardware accelerated)
-    - Outputs YUV frames to DroppingQueue
+    - Hands YUV frames directly to the SDL renderer
+    - A separate audio thread feeds queued AAC packets to the audio callback
 
-Stage C (Main Thread / SDL Renderer):
-    - Polls DroppingQueue for latest frame
+Stage C (SDL Render Thread):
+    - Takes the newest frame from its drop-oldest frame buffer
     - Updates SDL2 texture (GPU upload)
     - Renders at display refresh rate
 """
 
 import queue
 import threading
+import time
 from typing import Callable, Optional
 
+from src.core import affinity
 from src.core.aoa import AoaHost
 from src.core.auth import Authenticator
 from src.core.dropping_queue import DroppingQueue
 from src.core.protocol import (
+    HEADER_STRUCT,
     HEADER_TOTAL_SIZE,
+    MAX_PAYLOAD_SIZE,
     PacketType,
     ConfigSubtype,
-    create_header,
-    parse_header,
+)
+from src.media.h264 import (
+    NAL_PPS,
+    NAL_SPS,
+    SHORT_START_CODE,
+    START_CODE,
+    has_idr,
+    has_nal_type,
+    is_disposable,
 )
 from src.media.pyav_decoder import PyAVDecoder, YUVFrame
 from src.render.sdl_video import SDLVideoWindow
@@ -43,9 +55,33 @@ class StreamPipeline:
     3-thread pipeline for low-latency video streaming.
     
     Architecture:
-        USB Thread → VideoPacketQueue → Decoder Thread → DroppingQueue → SDL (Main Thread)
+        USB Thread → VideoPacketQueue → Decoder Thread → SDL frame slot → SDL Render Thread
     """
     
+    # Bytes requested per USB bulk read; a read still returns as soon as the
+    # device ends a transfer, so a large size only cuts the number of calls
+    USB_READ_SIZE = 256 * 1024
+    
+    # A read returns as soon as data arrives, so the timeout only sets how
+    # often an idle link wakes the pump; it stays below stop()'s 1 s join
+    USB_TIMEOUT_MS = 500
+    
+    # Receive buffer for USB reads awaiting packet parsing
+    RECEIVE_BUFFER_SIZE = 1 << 20
+    
+    # Most AAC packets (~21 ms each) the audio thread takes per wakeup
+    AUDIO_DRAIN_MAX = 4
+    
+    # H.264 packets buffered ahead of the decoder before the oldest is dropped
+    VIDEO_QUEUE_SIZE = 8
+    
+    # Seconds a video packet may wait in the queue before the decoder
+    # treats itself as behind the live edge (~3 frames at 60 fps)
+    VIDEO_MAX_LAG = 0.05
+    
+    # Minimum seconds between error prints from one worker thread
+    ERROR_PRINT_INTERVAL = 1.0
+    
     def __init__(
         self,
         aoa_host: AoaHost,
@@ -66,9 +102,13 @@ class StreamPipeline:
         
         # State
         self._running = False
+        self._error_state: dict = {}  # tag -> (last print time, suppressed count)
+        self._await_idr = False  # Video was evicted; skip packets until the next IDR
         
         # Queues
-        self._video_queue: queue.Queue = queue.Queue(maxsize=30)  # Raw H.264 packets
+        # (arrival time, raw H.264 packet); when the decoder stalls the oldest
+        # packet is evicted, so the queue never holds more than VIDEO_QUEUE_SIZE
+        self._video_queue: DroppingQueue[tuple] = DroppingQueue(maxsize=self.VIDEO_QUEUE_SIZE)
         self._audio_queue: queue.Queue = queue.Queue(maxsize=50)  # AAC packets
         self._frame_queue: DroppingQueue[YUVFrame] = DroppingQueue(maxsize=1)  # Decoded frames
         
@@ -76,9 +116,28 @@ class StreamPipeline:
         self._video_decoder = PyAVDecoder()
         self._sdl_window: Optional[SDLVideoWindow] = None
         
+        # Packet handlers by type, built once
+        self._stream_dispatch = {
+            PacketType.VIDEO: self._enqueue_video,
+            PacketType.AUDIO: self._enqueue_audio,
+        }
+        self._control_dispatch = {
+            PacketType.CONFIG: self._handle_config,
+            PacketType.AUTH_CHALLENGE: self._handle_challenge,
+            PacketType.AUTH_SUCCESS: self._on_auth_success,
+            PacketType.AUTH_FAIL: self._on_auth_fail,
+        }
+        
+        # Config subtypes consumed by the pipeline itself
+        self._config_dispatch = {
+            ConfigSubtype.VIDEO_SPS: self._video_decoder.set_sps,
+            ConfigSubtype.VIDEO_PPS: self._video_decoder.set_pps,
+        }
+        
         # Threads
         self._usb_thread: Optional[threading.Thread] = None
         self._decoder_thread: Optional[threading.Thread] = None
+        self._audio_thread: Optional[threading.Thread] = None
         
         # Callbacks
         self._audio_callback: Optional[Callable[[bytes], None]] = None
@@ -109,6 +168,11 @@ class StreamPipeline:
         # Set up decoder resolution callback
         self._video_decoder.set_resolution_callback(self._on_resolution_change)
         
+        # Discard a stop sentinel a previous consumer never took
+        self._video_queue.clear()
+        self._await_idr = False
+        self._drain_queue(self._audio_queue)
+        
         # Start USB pump thread (Stage A)
         self._usb_thread = threading.Thread(
             target=self._usb_pump_loop,
@@ -125,8 +189,13 @@ class StreamPipeline:
         )
         self._decoder_thread.start()
         
-        # Start frame render timer (Stage C is on main thread, driven by SDL)
-        self._start_render_polling()
+        # Start audio thread, so AAC decoding never stalls USB reads
+        self._audio_thread = threading.Thread(
+            target=self._audio_loop,
+            name="Audio_Decoder",
+            daemon=True
+        )
+        self._audio_thread.start()
         
         self._report_status("Pipeline started")
         return True
@@ -143,19 +212,42 @@ class StreamPipeline:
             self._sdl_window.stop()
             self._sdl_window = None
         
-        # Clear queues
-        self._video_queue = queue.Queue(maxsize=30)
-        self._audio_queue = queue.Queue(maxsize=50)
+        # Clear queues in place so running threads never see a stale queue
+        self._video_queue.clear()
+        self._drain_queue(self._audio_queue)
         self._frame_queue.clear()
         
+        # Wake the consumer threads blocked in get()
+        self._video_queue.put(None)
+        self._wake_consumer(self._audio_queue)
+        
         # Wait for threads
         if self._usb_thread and self._usb_thread.is_alive():
             self._usb_thread.join(timeout=1.0)
         if self._decoder_thread and self._decoder_thread.is_alive():
             self._decoder_thread.join(timeout=1.0)
+        if self._audio_thread and self._audio_thread.is_alive():
+            self._audio_thread.join(timeout=1.0)
         
         self._report_status("Pipeline stopped")
     
+    @staticmethod
+    def _wake_consumer(q: queue.Queue):
+        """Queue the None sentinel that makes a consumer loop exit."""
+        try:
+            q.put(None, timeout=0.5)
+        except queue.Full:
+            pass  # Consumer is gone or stuck; it is a daemon thread
+    
+    @staticmethod
+    def _drain_queue(q: queue.Queue):
+        """Discard all queued items with a single lock acquisition."""
+        with q.mutex:
+            q.queue.clear()
+            q.unfinished_tasks = 0
+            q.all_tasks_done.notify_all()
+            q.not_full.notify_all()
+    
     def _usb_pump_loop(self):
         """
         Stage A: USB Pump Thread.
@@ -163,111 +255,180 @@ class StreamPipeline:
         Reads data from USB as fast as possible, demuxes packets by type.
         Auth packets are handled immediately (high priority).
         """
-        buffer = bytearray()
+        affinity.pin_current_thread(affinity.RECEIVE)
+        
+        # Received bytes live in buffer[head:tail]; parsing only advances head
+        # and the unparsed tail is moved to the front once per read
+        buffer = bytearray(self.RECEIVE_BUFFER_SIZE)
+        view = memoryview(buffer)
+        head = tail = 0
+        
+        read_size = self.USB_READ_SIZE
+        read_into = self._aoa_host.read_into
+        timeout_ms = self.USB_TIMEOUT_MS
+        
+        # Headers are unpacked in place; unknown type bytes map to None
+        unpack_header = HEADER_STRUCT.unpack_from
+        packet_types = {t.value: t for t in PacketType}.get
+        video_type = PacketType.VIDEO
+        start_codes = (START_CODE, SHORT_START_CODE)
         
         while self._running and self._aoa_host.is_connected:
-            # Read USB data (non-blocking with short timeout)
-            data = self._aoa_host.read(16384, timeout_ms=50)
-            if data is None:
+            if tail + read_size > len(buffer):
+                pending = tail - head
+                if pending + read_size > len(buffer):
+                    # Grow (only if a read outgrows the buffer)
+                    grown = bytearray(max(2 * len(buffer), pending + read_size))
+                    grown[:pending] = view[head:tail]
+                    view.release()
+                    buffer = grown
+                    view = memoryview(buffer)
+                else:
+                    view[:pending] = view[head:tail]
+                head, tail = 0, pending
+            
+            # Read USB data straight into the buffer (short timeout)
+            count = read_into(view[tail:tail + read_size], timeout_ms=timeout_ms)
+            if count is None:
                 # Connection error
                 self._report_status("USB connection lost")
                 break
-            if len(data) == 0:
+            if count == 0:
                 continue
-            
-            buffer.extend(data)
+            tail += count
             
             # Process complete packets
-            while len(buffer) >= HEADER_TOTAL_SIZE:
-                header = parse_header(bytes(buffer[:HEADER_TOTAL_SIZE]))
-                if not header:
+            while tail - head >= HEADER_TOTAL_SIZE:
+                type_value, length = unpack_header(view, head)
+                packet_type = packet_types(type_value)
+                if packet_type is None or length > MAX_PAYLOAD_SIZE:
                     # Invalid header, skip one byte
-                    buffer = buffer[1:]
+                    head += 1
                     continue
                 
-                total_size = HEADER_TOTAL_SIZE + header.length
-                if len(buffer) < total_size:
+                total_size = HEADER_TOTAL_SIZE + length
+                if tail - head < total_size:
                     # Incomplete packet, wait for more data
                     break
                 
-                # Extract payload
-                payload = bytes(buffer[HEADER_TOTAL_SIZE:total_size])
-                buffer = buffer[total_size:]
+                # Extract payload; video without a start code gets one in the
+                # same copy, so the decoder's ensure_start_code is a no-op
+                payload_start = head + HEADER_TOTAL_SIZE
+                payload_end = head + total_size
+                if (packet_type is video_type and length >= 4
+                        and not buffer.startswith(start_codes, payload_start)):
+                    payload = START_CODE + view[payload_start:payload_end]
+                else:
+                    payload = bytes(view[payload_start:payload_end])
+                head += total_size
                 
                 # Demux by packet type
-                self._handle_packet(header.type, payload)
+                self._handle_packet(packet_type, payload)
         
         self._running = False
     
     def _handle_packet(self, packet_type: PacketType, payload: bytes):
         """Handle a received packet based on its type."""
+        # Media packets: one lookup, no logging
+        enqueue = self._stream_dispatch.get(packet_type)
+        if enqueue:
+            enqueue(payload)
+            return
+        
+        # Debug: Log all control packet types
+        print(f"[Pipeline] Packet: type={packet_type.name}, len={len(payload)}")
+        handler = self._control_dispatch.get(packet_type)
+        if handler:
+            handler(payload)
+    
+    def _enqueue_video(self, payload: bytes):
+        """
+        Queue an H.264 packet for the decoder, stamped with its arrival time.
         
-        # Debug: Log all packet types
-        if packet_type == PacketType.VIDEO:
-            pass  # Don't spam video packets
-        elif packet_type == PacketType.AUDIO:
-            pass  # Don't spam audio packets
-        else:
-            print(f"[Pipeline] Packet: type={packet_type.name}, len={len(payload)}")
-        
-        if packet_type == PacketType.VIDEO:
-            # Queue for decoder thread
-            try:
-                self._video_queue.put_nowait(payload)
-            except queue.Full:
-                pass  # Drop frame if queue full
-        
-        elif packet_type == PacketType.AUDIO:
-            # Pass audio directly to callback for decoding
-            if self._audio_callback:
-                self._audio_callback(payload)
-        
-        elif packet_type == PacketType.CONFIG:
-            # Handle config packets (SPS/PPS/AAC config)
-            if len(payload) < 1:
+        A full queue evicts its oldest packet, usually a reference slice that
+        the packets queued after it depend on. Decoding then resumes at a
+        queued IDR, or the backlog is dropped and packets are skipped until
+        the next IDR arrives.
+        """
+        if self._await_idr:
+            if has_idr(payload):
+                self._await_idr = False
+                print("[Pipeline] IDR received, resuming video")
+            elif not has_nal_type(payload, (NAL_SPS, NAL_PPS)):
                 return
-            subtype = payload[0]
-            config_data = payload[1:]
-            
-            if subtype == ConfigSubtype.VIDEO_SPS:
-                self._video_decoder.set_sps(config_data)
-            elif subtype == ConfigSubtype.VIDEO_PPS:
-                self._video_decoder.set_pps(config_data)
-            
-            # Also notify config callback
-            if self._config_callback:
-                self._config_callback(subtype, config_data)
-        
-        elif packet_type == PacketType.AUTH_CHALLENGE:
-            # IMMEDIATE: Handle auth challenge (high priority)
-            signature = self._authenticator.sign_challenge(payload)
-            if signature:
-                response = create_header(PacketType.AUTH_RESPONSE, len(signature)) + signature
-                self._aoa_host.write(response)
-                self._report_status("Auth response sent")
-            else:
-                self._report_status(f"Auth failed: {self._authenticator.last_error}")
-        
-        elif packet_type == PacketType.AUTH_SUCCESS:
-            self._report_status("Authentication successful")
-        
-        elif packet_type == PacketType.AUTH_FAIL:
-            self._report_status("Authentication failed")
-            self._running = False
+        
+        video_queue = self._video_queue
+        if not video_queue.put((time.monotonic(), payload)):
+            return
+        if video_queue.discard_before(self._is_queued_idr) or not self._running:
+            return
+        # Not while stopping: clear() could swallow stop()'s None sentinel
+        video_queue.clear()
+        self._await_idr = True
+        print("[Pipeline] Video queue overflow, dropping frames until the next IDR")
+    
+    def _enqueue_audio(self, payload: bytes):
+        """Queue an AAC packet for the audio thread."""
+        try:
+            self._audio_queue.put_nowait(payload)
+        except queue.Full:
+            pass  # Drop packet if queue full
+    
+    def _handle_config(self, payload: bytes):
+        """Handle config packets (SPS/PPS/AAC config)."""
+        if len(payload) < 1:
+            return
+        subtype = payload[0]
+        config_data = payload[1:]
+        
+        handler = self._config_dispatch.get(subtype)
+        if handler:
+            handler(config_data)
+        
+        # Also notify config callback
+        if self._config_callback:
+            self._config_callback(subtype, config_data)
+    
+    def _handle_challenge(self, payload: bytes):
+        """IMMEDIATE: Handle auth challenge (high priority)."""
+        signature = self._authenticator.sign_challenge(payload)
+        if signature:
+            self._aoa_host.write_packet(PacketType.AUTH_RESPONSE, signature)
+            self._report_status("Auth response sent")
+        else:
+            self._report_status(f"Auth failed: {self._authenticator.last_error}")
+    
+    def _on_auth_success(self, payload: bytes):
+        self._report_status("Authentication successful")
+    
+    def _on_auth_fail(self, payload: bytes):
+        self._report_status("Authentication failed")
+        self._running = False
     
     def _decoder_loop(self):
         """
         Stage B: Decoder Engine Thread.
         
-        Consumes video packets, decodes to YUV frames, outputs to DroppingQueue.
+        Consumes video packets, decodes to YUV frames and hands each frame
+        straight to the SDL window's frame buffer, so decoding of the
+        next frame overlaps with upload/present of the current one. The
+        latest frame is also kept in the DroppingQueue for external readers.
         """
+        affinity.pin_current_thread(affinity.VIDEO)
+        
         video_packets_received = 0
         frames_decoded = 0
         
+        video_queue = self._video_queue
+        max_lag = self.VIDEO_MAX_LAG
         while self._running:
+            # Block until a packet arrives; stop() wakes us with None
+            item = video_queue.get(block=True)
+            if item is None:
+                break
+            arrival, h264_data = item
+            
             try:
-                # Get video packet (blocking with timeout)
-                h264_data = self._video_queue.get(timeout=0.1)
                 video_packets_received += 1
                 
                 # Log first few packets
@@ -276,42 +437,86 @@ class StreamPipeline:
                 elif video_packets_received % 100 == 0:
                     print(f"[Decoder] Video packets: {video_packets_received}, frames: {frames_decoded}")
                 
+                # Behind the live edge: if an IDR is already queued, nothing
+                # after it references this packet or the ones before it
+                behind = time.monotonic() - arrival > max_lag
+                if behind and video_queue.discard_before(self._is_queued_idr):
+                    continue
+                
+                # A stale frame, or one the renderer would overwrite before
+                # showing it, is skipped when no later frame references it
+                sdl_window = self._sdl_window
+                if ((behind or (sdl_window and not sdl_window.can_accept_frame()))
+                        and is_disposable(h264_data)):
+                    continue
+                
                 # Decode
                 frame = self._video_decoder.decode(h264_data)
                 
                 if frame:
                     frames_decoded += 1
-                    # Put to dropping queue (overwrites old frame if present)
-                    dropped = self._frame_queue.put(frame)
-                    if dropped:
-                        pass  # Normal for real-time - old frame discarded
+                    if sdl_window:
+                        sdl_window.update_frame(frame.yuv_bytes, frame.width, frame.height)
+                    # Keep latest frame for external readers (overwrites old frame)
+                    self._frame_queue.put(frame)
                 
-            except queue.Empty:
-                continue
             except Exception as e:
-                print(f"[Decoder] Error: {e}")
+                self._report_error('Decoder', e)
     
-    def _start_render_polling(self):
-        """Start polling the frame queue for rendering."""
-        # SDL window handles its own event loop and frame display
-        # We just need to push frames to it
-        def render_poll():
-            while self._running and self._sdl_window and self._sdl_window.is_running:
-                frame = self._frame_queue.get(timeout=0.016)  # ~60fps polling
-                if frame and self._sdl_window:
-                    self._sdl_window.update_frame(
-                        frame.yuv_bytes,
-                        frame.width,
-                        frame.height
-                    )
-        
-        # Run in separate thread to not block
-        render_thread = threading.Thread(
-            target=render_poll,
-            name="Render_Poll",
-            daemon=True
-        )
-        render_thread.start()
+    @staticmethod
+    def _is_queued_idr(queued) -> bool:
+        """Return True if a queued (arrival, packet) item holds an IDR slice."""
+        return queued is not None and has_idr(queued[1])
+    
+    def _audio_loop(self):
+        """
+        Hand queued AAC packets to the audio callback off the USB thread.
+        
+        Each wakeup drains up to AUDIO_DRAIN_MAX packets that are already
+        queued, so a burst is decoded back to back instead of one blocking
+        get() per packet.
+        """
+        affinity.pin_current_thread(affinity.AUDIO)
+        
+        audio_queue = self._audio_queue
+        drain_max = self.AUDIO_DRAIN_MAX
+        while self._running:
+            # Block until a packet arrives; stop() wakes us with None
+            batch = [audio_queue.get()]
+            while len(batch) < drain_max:
+                try:
+                    batch.append(audio_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            callback = self._audio_callback
+            for payload in batch:
+                if payload is None:
+                    return
+                if not callback:
+                    continue
+                try:
+                    callback(payload)
+                except Exception as e:
+                    self._report_error('Audio', e)
+    
+    def _report_error(self, tag: str, error: Exception):
+        """
+        Print a worker-thread error at most once per ERROR_PRINT_INTERVAL.
+        
+        Each tag is only reported from its own thread, so the per-tag
+        timestamps need no lock. Suppressed errors are counted.
+        """
+        now = time.monotonic()
+        last_time, suppressed = self._error_state.get(tag, (0.0, 0))
+        if now - last_time < self.ERROR_PRINT_INTERVAL:
+            self._error_state[tag] = (last_time, suppressed + 1)
+            return
+        self._error_state[tag] = (now, 0)
+        if suppressed:
+            print(f"[{tag}] Error: {error} ({suppressed} more suppressed)")
+        else:
+            print(f"[{tag}] Error: {error}")
     
     def _on_resolution_change(self, width: int, height: int):
         """Handle video resolution change."""
@@ -3,6 +3,7 @@ Protocol constants and utilities for Wolfkrypt stream protocol.
 Matches Android app StreamProtocol.kt
 """
 
+import logging
 import struct
 from dataclasses import dataclass
 from enum import IntEnum
@@ -35,6 +36,9 @@ HEADER_TYPE_SIZE = 1
 HEADER_LENGTH_SIZE = 4
 HEADER_TOTAL_SIZE = HEADER_TYPE_SIZE + HEADER_LENGTH_SIZE
 
+# Header layout: type (uint8) + payload length (big-endian uint32), compiled once
+HEADER_STRUCT = struct.Struct('>BI')
+
 # Maximum payload size (64KB)
 MAX_PAYLOAD_SIZE = 65536
 
@@ -57,26 +61,37 @@ class PacketHeader:
 
 def parse_header(data: bytes) -> Optional[PacketHeader]:
     """Parse a packet header from bytes."""
-    if len(data) < HEADER_TOTAL_SIZE:
+    return parse_header_from(data, 0)
+
+
+def parse_header_from(buffer, offset: int) -> Optional[PacketHeader]:
+    """
+    Parse a packet header at offset in any bytes-like buffer, without copying.
+    
+    Returns None if fewer than HEADER_TOTAL_SIZE bytes are available or the
+    header is invalid.
+    """
+    if len(buffer) - offset < HEADER_TOTAL_SIZE:
         return None
     
-    packet_type = data[0]
-    length = struct.unpack('>I', data[1:5])[0]  # Big-endian uint32
+    packet_type, length = HEADER_STRUCT.unpack_from(buffer, offset)
     
     # Sanity check: enforce maximum payload size
     if length > MAX_PAYLOAD_SIZE:
-        import logging
         logging.error(
-            f"Packet length {length} exceeds maximum allowed {MAX_PAYLOAD_SIZE} – discarding packet"
+            "Packet length %d exceeds maximum allowed %d – discarding packet",
+            length, MAX_PAYLOAD_SIZE
         )
         return None
     
-    import logging
-    logging.debug(
-        f"Parsed packet header: type={PacketType(packet_type).name}, length={length}"
-    )
+    try:
+        packet_type = PacketType(packet_type)
+    except ValueError:
+        return None  # Unknown type: not a header, let the caller resync
+    # Runs per packet: arguments are only formatted if DEBUG is enabled
+    logging.debug("Parsed packet header: type=%s, length=%d", packet_type.name, length)
     
-    return PacketHeader(type=PacketType(packet_type), length=length)
+    return PacketHeader(type=packet_type, length=length)
 
 
 def create_header(packet_type: PacketType, length: int) -> bytes:
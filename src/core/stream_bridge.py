@@ -6,15 +6,16 @@ High-throughput version with minimal Python overhead.
 import threading
 from typing import Callable, Optional
 
+from src.core import affinity
 from src.core.aoa import AoaHost
 from src.core.auth import Authenticator
 from src.core.protocol import (
+    HEADER_STRUCT,
     HEADER_TOTAL_SIZE,
     PacketType,
     ConfigSubtype,
-    create_header,
-    parse_header,
 )
+from src.media.h264 import SHORT_START_CODE, START_CODE, ensure_start_code
 from src.render.mpv_bridge import MPVBridge
 
 
@@ -22,8 +23,8 @@ class StreamBridge:
     """Optimized USB to MPV bridge."""
     
     # Performance tuning
-    USB_READ_SIZE = 65536
-    USB_TIMEOUT_MS = 100
+    USB_READ_SIZE = 256 * 1024  # Reads return early when the device ends a transfer
+    USB_TIMEOUT_MS = 500  # Only paces idle wakeups; stays below stop()'s 1 s join
     FLUSH_INTERVAL = 1
     
     def __init__(
@@ -88,12 +89,17 @@ class StreamBridge:
     def _usb_loop_optimized(self):
         """Optimized USB loop with minimal allocations."""
         
-        # Pre-allocate buffer
+        affinity.pin_current_thread(affinity.RECEIVE)
+        
+        # Pre-allocate buffer; received bytes live in buffer[head:tail] and
+        # the unparsed tail is moved to the front only when a read won't fit
         buffer = bytearray(self.USB_READ_SIZE * 4)
-        buffer_len = 0
+        view = memoryview(buffer)
+        head = tail = 0
         
         # Pre-compute constants
         header_size = HEADER_TOTAL_SIZE
+        unpack_header = HEADER_STRUCT.unpack_from
         video_type = PacketType.VIDEO
         audio_type = PacketType.AUDIO
         config_type = PacketType.CONFIG
@@ -102,61 +108,72 @@ class StreamBridge:
         auth_fail = PacketType.AUTH_FAIL
         
         # Start code for video
-        start_code = b'\x00\x00\x00\x01'
+        start_code = START_CODE
+        start_codes = (START_CODE, SHORT_START_CODE)
+        
+        read_size = self.USB_READ_SIZE
+        read_into = self._aoa_host.read_into
         
         while self._running and self._aoa_host.is_connected:
-            # Large USB read
-            data = self._aoa_host.read(self.USB_READ_SIZE, timeout_ms=self.USB_TIMEOUT_MS)
+            if tail + read_size > len(buffer):
+                pending = tail - head
+                if pending + read_size > len(buffer):
+                    # Grow buffer if needed
+                    grown = bytearray(pending + read_size)
+                    grown[:pending] = view[head:tail]
+                    view.release()
+                    buffer = grown
+                    view = memoryview(buffer)
+                else:
+                    view[:pending] = view[head:tail]
+                head, tail = 0, pending
+            
+            # Large USB read, straight into the free end of the buffer
+            data_len = read_into(view[tail:tail + read_size], timeout_ms=self.USB_TIMEOUT_MS)
             
-            if data is None:
+            if data_len is None:
                 self._report_status("USB disconnected")
                 break
             
-            if len(data) == 0:
+            if data_len == 0:
                 continue
             
-            self._bytes_received += len(data)
-            
-            # Append to buffer using memoryview where possible
-            data_len = len(data)
-            if buffer_len + data_len > len(buffer):
-                # Grow buffer if needed
-                buffer.extend(b'\x00' * (buffer_len + data_len - len(buffer)))
-            buffer[buffer_len:buffer_len + data_len] = data
-            buffer_len += data_len
+            self._bytes_received += data_len
+            tail += data_len
             
             # Process packets
-            pos = 0
-            while pos + header_size <= buffer_len:
-                # Parse header inline (avoid function call)
-                header_bytes = buffer[pos:pos + header_size]
-                pkt_type = header_bytes[0]
-                pkt_len = (header_bytes[1] << 24) | (header_bytes[2] << 16) | (header_bytes[3] << 8) | header_bytes[4]
+            while head + header_size <= tail:
+                # Parse header in place (no slice copy)
+                pkt_type, pkt_len = unpack_header(buffer, head)
                 
                 total = header_size + pkt_len
-                if pos + total > buffer_len:
+                if head + total > tail:
                     break
                 
                 # Extract payload
-                payload_start = pos + header_size
-                payload_end = pos + total
+                payload_start = head + header_size
+                payload_end = head + total
                 
                 # Route packet
                 if pkt_type == video_type:
-                    # CRITICAL: Drop video until config is sent
-                    if not self._config_sent:
-                        if self._sps and self._pps:
-                            self._send_config_to_mpv()
-                        else:
-                            # Skip video frame - no config yet
-                            pos = pos + total
-                            continue
+                    # CRITICAL: Drop video until there is config to send
+                    if not self._config_sent and not (self._sps and self._pps):
+                        # Skip video frame - no config yet
+                        head += total
+                        continue
                     
-                    payload = bytes(buffer[payload_start:payload_end])
+                    # Copy the payload out of the receive buffer exactly once
+                    # (a bytearray slice would copy twice)
+                    if pkt_len >= 4 and not buffer.startswith(start_codes, payload_start):
+                        payload = start_code + view[payload_start:payload_end]
+                    else:
+                        payload = bytes(view[payload_start:payload_end])
                     
-                    # Check start code
-                    if len(payload) >= 4 and payload[:4] != start_code and payload[:3] != b'\x00\x00\x01':
-                        payload = start_code + payload
+                    if not self._config_sent:
+                        # SPS/PPS reach mpv in the same write as this frame
+                        payload = self._sps + self._pps + payload
+                        self._config_sent = True
+                        print("[StreamBridge] Sent SPS/PPS with video frame")
                     
                     self._video_player.write(payload)
                     self._video_packets += 1
@@ -168,7 +185,7 @@ class StreamBridge:
                         self._report_status("First video frame sent")
                 
                 elif pkt_type == config_type:
-                    payload = bytes(buffer[payload_start:payload_end])
+                    payload = bytes(view[payload_start:payload_end])
                     self._handle_config(payload)
                 
                 elif pkt_type == audio_type:
@@ -176,7 +193,7 @@ class StreamBridge:
                     pass
                 
                 elif pkt_type == auth_challenge:
-                    payload = bytes(buffer[payload_start:payload_end])
+                    payload = bytes(view[payload_start:payload_end])
                     self._handle_auth(payload)
                 
                 elif pkt_type == auth_success:
@@ -186,14 +203,7 @@ class StreamBridge:
                     self._report_status("Auth failed")
                     self._running = False
                 
-                pos = pos + total
-            
-            # Compact buffer
-            if pos > 0:
-                remaining = buffer_len - pos
-                if remaining > 0:
-                    buffer[:remaining] = buffer[pos:buffer_len]
-                buffer_len = remaining
+                head += total
         
         self._running = False
         print(f"[StreamBridge] Total: {self._video_packets} packets, {self._bytes_received / 1024 / 1024:.1f} MB")
@@ -205,38 +215,28 @@ class StreamBridge:
         subtype = payload[0]
         config_data = payload[1:]
         
+        # New parameter sets are sent ahead of the next video frame
         if subtype == ConfigSubtype.VIDEO_SPS:
-            if not config_data.startswith(b'\x00\x00\x00\x01'):
-                config_data = b'\x00\x00\x00\x01' + config_data
+            config_data = ensure_start_code(config_data)
+            if config_data != self._sps:
+                self._config_sent = False
             self._sps = config_data
             print(f"[StreamBridge] SPS: {len(config_data)} bytes")
         
         elif subtype == ConfigSubtype.VIDEO_PPS:
-            if not config_data.startswith(b'\x00\x00\x00\x01'):
-                config_data = b'\x00\x00\x00\x01' + config_data
+            config_data = ensure_start_code(config_data)
+            if config_data != self._pps:
+                self._config_sent = False
             self._pps = config_data
             print(f"[StreamBridge] PPS: {len(config_data)} bytes")
-            if self._sps:
-                self._send_config_to_mpv()
         
         if self._config_callback:
             self._config_callback(subtype, config_data)
     
-    def _send_config_to_mpv(self):
-        if self._config_sent or not self._sps or not self._pps:
-            return
-        
-        print("[StreamBridge] Sending SPS/PPS...")
-        self._video_player.write(self._sps)
-        self._video_player.write(self._pps)
-        self._video_player.flush()
-        self._config_sent = True
-    
     def _handle_auth(self, challenge: bytes):
         signature = self._authenticator.sign_challenge(challenge)
         if signature:
-            response = create_header(PacketType.AUTH_RESPONSE, len(signature)) + signature
-            self._aoa_host.write(response)
+            self._aoa_host.write_packet(PacketType.AUTH_RESPONSE, signature)
             self._report_status("Auth response sent")
         else:
             self._report_status(f"Auth failed: {self._authenticator.last_error}")
@@ -4,6 +4,7 @@ Wolfkrypt Host - Screen Mirror Application
 Entry point for the application.
 """
 
+import gc
 import sys
 
 from PyQt6.QtWidgets import QApplication
@@ -24,6 +25,11 @@ def main():
     window = MainWindow()
     window.show()
     
+    # Qt wrappers and module objects created so far live for the whole
+    # session; freezing them keeps streaming-time GC passes from rescanning them
+    gc.collect()
+    gc.freeze()
+    
     sys.exit(app.exec())
 
 
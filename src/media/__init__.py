@@ -3,4 +3,4 @@
 from src.media.video import VideoDecoder
 from src.media.audio import AudioDecoder
 
-__all__ = ['VideoDecoder', 'AudioDecoder']
+__all__ = ('VideoDecoder', 'AudioDecoder')
@@ -14,7 +14,17 @@ except ImportError:
 class AudioDecoder:
     """Decodes AAC audio frames using FFmpeg via PyAV."""
     
-    def __init__(self):
+    # Samples per resampled output block (matches AudioPlayer's blocksize)
+    RESAMPLE_FRAME_SIZE = 1024
+    
+    def __init__(self, output_rate: Optional[int] = None):
+        """
+        Args:
+            output_rate: If set, samples are resampled to this rate as packed
+                         float32 stereo (samples, channels) blocks of
+                         RESAMPLE_FRAME_SIZE, so the output device never has
+                         to be reopened at the stream's rate.
+        """
         self._codec: Optional[av.CodecContext] = None
         self._config: Optional[bytes] = None
         self._initialized = False
@@ -22,6 +32,8 @@ class AudioDecoder:
         self._sample_callback: Optional[Callable[[np.ndarray, int], None]] = None
         self.sample_rate = 44100
         self.channels = 2
+        self._output_rate = output_rate
+        self._resampler: Optional['av.AudioResampler'] = None
     
     def set_sample_callback(self, callback: Callable[[np.ndarray, int], None]):
         """Set callback for decoded audio samples."""
@@ -39,6 +51,15 @@ class AudioDecoder:
                 codec = av.codec.Codec('aac', 'r')
                 self._codec = codec.create()
                 self._codec.extradata = self._config
+                if self._output_rate:
+                    # swresample converts rate and layout in one SIMD pass
+                    # and buffers the remainder into fixed-size blocks
+                    self._resampler = av.AudioResampler(
+                        format='flt',
+                        layout='stereo',
+                        rate=self._output_rate,
+                        frame_size=self.RESAMPLE_FRAME_SIZE
+                    )
                 self._initialized = True
                 print("[AudioDecoder] Initialized with AAC config")
             except Exception as e:
@@ -55,31 +76,40 @@ class AudioDecoder:
             
             # Decode frames
             for frame in self._codec.decode(packet):
-                # Get audio samples as float32 numpy array
-                samples = frame.to_ndarray()
-                
                 # Update sample rate and channels
                 self.sample_rate = frame.sample_rate
                 self.channels = len(frame.layout.channels)
                 
-                if self._sample_callback:
-                    self._sample_callback(samples, self.sample_rate)
-                
-                return samples
+                return self._emit_frame(frame)
         except Exception as e:
             self.last_error = f"Decode error: {e}"
             return None
         
         return None
     
+    def _emit_frame(self, frame: 'av.AudioFrame') -> Optional[np.ndarray]:
+        """Pass a decoded frame's samples to the callback, resampled if configured."""
+        if self._resampler is None:
+            # Get audio samples as float32 numpy array
+            samples = frame.to_ndarray()
+            if self._sample_callback:
+                self._sample_callback(samples, frame.sample_rate)
+            return samples
+        
+        samples = None
+        for block in self._resampler.resample(frame):
+            # Packed output is one interleaved row; view it as (samples, channels)
+            samples = block.to_ndarray().reshape(-1, 2)
+            if self._sample_callback:
+                self._sample_callback(samples, self._output_rate)
+        return samples
+    
     def flush(self):
         """Flush any remaining samples."""
         if self._codec:
             try:
                 for frame in self._codec.decode(None):
-                    if self._sample_callback:
-                        samples = frame.to_ndarray()
-                        self._sample_callback(samples, frame.sample_rate)
+                    self._emit_frame(frame)
             except Exception:
                 pass
     
@@ -87,4 +117,5 @@ class AudioDecoder:
         """Reset the decoder."""
         self._codec = None
         self._config = None
+        self._resampler = None
         self._initialized = False
@@ -0,0 +1,121 @@
+"""
+H.264 Annex B bitstream helpers.
+
+Start-code scanning uses bytes.find(), which runs as a C-level memory
+search instead of Python-level byte comparisons.
+"""
+
+from typing import List, Tuple
+
+START_CODE = b'\x00\x00\x00\x01'
+SHORT_START_CODE = b'\x00\x00\x01'
+_START_CODES = (START_CODE, SHORT_START_CODE)
+
+# NAL unit types
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SEI = 6
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+
+# Slice NAL types that carry picture data (video coding layer)
+VCL_TYPES = (NAL_SLICE, NAL_IDR)
+
+
+def has_start_code(data: bytes) -> bool:
+    """Return True if data begins with a 3- or 4-byte Annex B start code."""
+    return data.startswith(_START_CODES)
+
+
+def ensure_start_code(data: bytes) -> bytes:
+    """Prefix a 4-byte start code unless data already has one."""
+    if has_start_code(data):
+        return data
+    return START_CODE + data
+
+
+def nal_type(data: bytes) -> int:
+    """Return the type of the first NAL unit in data, or -1 if empty."""
+    if data.startswith(START_CODE):
+        offset = 4
+    elif data.startswith(SHORT_START_CODE):
+        offset = 3
+    else:
+        offset = 0
+    if len(data) <= offset:
+        return -1
+    return data[offset] & 0x1F
+
+
+def find_nal_units(data: bytes) -> List[Tuple[int, int]]:
+    """
+    Locate every NAL unit in an Annex B buffer.
+
+    Returns:
+        List of (start, end) offsets of each NAL unit, excluding start codes.
+    """
+    units = []
+    find = data.find
+    pos = find(SHORT_START_CODE)
+    while pos >= 0:
+        start = pos + 3
+        next_pos = find(SHORT_START_CODE, start)
+        if next_pos < 0:
+            units.append((start, len(data)))
+            break
+        # The leading zero of a 4-byte start code belongs to the next unit
+        end = next_pos - 1 if next_pos > start and data[next_pos - 1] == 0 else next_pos
+        units.append((start, end))
+        pos = next_pos
+    return units
+
+
+def contains_vcl(data: bytes) -> bool:
+    """Return True if any NAL unit in data is a picture slice."""
+    for start, end in find_nal_units(data):
+        if end > start and data[start] & 0x1F in VCL_TYPES:
+            return True
+    return False
+
+
+def is_disposable(data: bytes) -> bool:
+    """
+    Return True if data holds only non-reference picture slices.
+
+    Such slices (type 1 with nal_ref_idc 0) are never used to predict other
+    pictures, so they can be dropped without corrupting later frames.
+    """
+    has_slice = False
+    for start, end in find_nal_units(data):
+        if end <= start:
+            continue
+        header = data[start]
+        unit_type = header & 0x1F
+        if unit_type == NAL_SLICE and not header & 0x60:
+            has_slice = True
+        elif unit_type in (NAL_IDR, NAL_SLICE, NAL_SPS, NAL_PPS):
+            return False
+    return has_slice
+
+
+def has_nal_type(data: bytes, types: Tuple[int, ...]) -> bool:
+    """Return True if any NAL unit in data has one of the given types."""
+    find = data.find
+    last = len(data) - 3
+    pos = find(SHORT_START_CODE)
+    while 0 <= pos < last:
+        if data[pos + 3] & 0x1F in types:
+            return True
+        pos = find(SHORT_START_CODE, pos + 3)
+    return False
+
+
+def has_idr(data: bytes) -> bool:
+    """Return True if data contains an IDR slice anywhere in the buffer."""
+    return has_nal_type(data, (NAL_IDR,))
+
+
+def split_nal_units(data: bytes) -> List[bytes]:
+    """Split an Annex B buffer into NAL units (without start codes)."""
+    return [data[start:end] for start, end in find_nal_units(data)]
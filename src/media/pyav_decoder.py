@@ -8,8 +8,11 @@ integration with the SDL2 rendering pipeline.
 
 import platform
 import threading
+import time
 from dataclasses import dataclass
-from typing import Callable, Optional, Tuple
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
 
 try:
     import av
@@ -19,20 +22,56 @@ except ImportError:
     PYAV_AVAILABLE = False
     print("[PyAVDecoder] Warning: PyAV not available")
 
+try:
+    from av.codec.hwaccel import HWAccel, hwdevices_available
+    HWACCEL_AVAILABLE = True
+except ImportError:
+    HWACCEL_AVAILABLE = False
+
+from src.core import affinity
+from src.media.h264 import (
+    NAL_AUD,
+    NAL_PPS,
+    NAL_SEI,
+    NAL_SPS,
+    START_CODE,
+    contains_vcl,
+    ensure_start_code,
+    find_nal_units,
+    has_idr,
+    has_nal_type,
+    nal_type,
+)
+
+# Hardware device types to try, in order, when hw_accel is auto-detected
+HW_DEVICE_PREFERENCE = {
+    'Windows': ('d3d11va', 'cuda', 'dxva2'),
+    'Linux': ('vaapi', 'cuda'),
+    'Darwin': ('videotoolbox',),
+}
+
 
 @dataclass
 class YUVFrame:
-    """Container for decoded YUV420P frame data."""
-    y_plane: bytes
-    u_plane: bytes
-    v_plane: bytes
+    """
+    Container for decoded YUV420P frame data.
+    
+    When ``data`` is set, the planes are memoryview slices of that one
+    contiguous buffer and no per-plane copies exist.
+    """
+    y_plane: Union[bytes, memoryview]
+    u_plane: Union[bytes, memoryview]
+    v_plane: Union[bytes, memoryview]
     width: int
     height: int
+    data: Optional[Union[bytes, bytearray]] = None
     
     @property
-    def yuv_bytes(self) -> bytes:
-        """Return concatenated YUV420P bytes for SDL2 texture upload."""
-        return self.y_plane + self.u_plane + self.v_plane
+    def yuv_bytes(self) -> Union[bytes, bytearray]:
+        """Return contiguous YUV420P data for SDL2 texture upload."""
+        if self.data is not None:
+            return self.data
+        return bytes(self.y_plane) + bytes(self.u_plane) + bytes(self.v_plane)
     
     @property
     def size(self) -> Tuple[int, int]:
@@ -44,24 +83,29 @@ class PyAVDecoder:
     Hardware-accelerated H.264 decoder using PyAV.
     
     Features:
-    - Windows: d3d11va (Direct3D 11), dxva2 fallback
-    - Linux: vaapi, software fallback
-    - macOS: videotoolbox, software fallback
+    - Windows: d3d11va (Direct3D 11), then cuda (NVDEC), then dxva2
+    - Linux: vaapi, then cuda
+    - macOS: videotoolbox
+    - Software fallback when no hardware device opens
     - Outputs YUV420P frames for direct SDL2 texture upload
     """
     
+    # Minimum seconds between decode-error prints during an error burst
+    ERROR_PRINT_INTERVAL = 1.0
+    
     def __init__(self, hw_accel: Optional[str] = None):
         """
         Initialize the decoder.
         
         Args:
-            hw_accel: Hardware acceleration method. None for auto-detect.
-                      Options: 'd3d11va', 'dxva2', 'vaapi', 'videotoolbox', 'auto', None
+            hw_accel: Hardware device type. None or 'auto' to try the platform's
+                      devices in HW_DEVICE_PREFERENCE order.
+                      Options: 'd3d11va', 'dxva2', 'cuda', 'vaapi', 'videotoolbox', 'auto', None
         """
         if not PYAV_AVAILABLE:
             raise RuntimeError("PyAV is not installed")
         
-        self._hw_accel = hw_accel or self._detect_hw_accel()
+        self._hw_accel = hw_accel or 'auto'
         self._codec_ctx: Optional[av.codec.CodecContext] = None
         self._running = False
         self._lock = threading.Lock()
@@ -71,28 +115,30 @@ class PyAVDecoder:
         self._pps: Optional[bytes] = None
         self._config_ready = False
         
+        # Non-VCL NALs (SEI/AUD/SPS/PPS) held until the access unit's slice arrives
+        self._pending_nals = bytearray()
+        
         # Callbacks
         self._frame_callback: Optional[Callable[[YUVFrame], None]] = None
         self._resolution_callback: Optional[Callable[[int, int], None]] = None
         
         # Stats
         self._frames_decoded = 0
+        self._decode_errors = 0
+        self._last_error_time = 0.0
         self._width = 0
         self._height = 0
         
-    def _detect_hw_accel(self) -> str:
-        """Detect best available hardware acceleration for this platform."""
-        system = platform.system()
-        
-        if system == 'Windows':
-            # Try d3d11va first (better than dxva2)
-            return 'd3d11va'
-        elif system == 'Linux':
-            return 'vaapi'
-        elif system == 'Darwin':  # macOS
-            return 'videotoolbox'
+    def _hw_device_candidates(self) -> list:
+        """Return the hardware device types to try, limited to those FFmpeg supports."""
+        if not HWACCEL_AVAILABLE:
+            return []
+        if self._hw_accel == 'auto':
+            preferred = HW_DEVICE_PREFERENCE.get(platform.system(), ())
         else:
-            return 'auto'
+            preferred = (self._hw_accel,)
+        available = set(hwdevices_available())
+        return [device for device in preferred if device in available]
     
     def set_frame_callback(self, callback: Callable[[YUVFrame], None]):
         """Set callback for decoded frames."""
@@ -109,10 +155,9 @@ class PyAVDecoder:
         The SPS contains codec configuration including resolution.
         Start code (00 00 00 01) is added if missing.
         """
-        # Ensure start code
-        if not sps.startswith(b'\x00\x00\x00\x01') and not sps.startswith(b'\x00\x00\x01'):
-            sps = b'\x00\x00\x00\x01' + sps
-        
+        sps = ensure_start_code(sps)
+        if sps == self._sps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
         self._sps = sps
         print(f"[PyAVDecoder] SPS: {len(sps)} bytes")
         
@@ -126,9 +171,9 @@ class PyAVDecoder:
         
         Start code (00 00 00 01) is added if missing.
         """
-        if not pps.startswith(b'\x00\x00\x00\x01') and not pps.startswith(b'\x00\x00\x01'):
-            pps = b'\x00\x00\x00\x01' + pps
-        
+        pps = ensure_start_code(pps)
+        if pps == self._pps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
         self._pps = pps
         print(f"[PyAVDecoder] PPS: {len(pps)} bytes")
         
@@ -145,70 +190,49 @@ class PyAVDecoder:
             print("[PyAVDecoder] Cannot initialize: missing SPS or PPS")
             return False
         
-        try:
-            # Find H.264 decoder
-            codec = av.Codec('h264', 'r')  # 'r' for decoder
-            
-            # Create codec context with hardware acceleration options
-            self._codec_ctx = av.CodecContext.create(codec)
-            
-            # Configure for low latency
-            self._codec_ctx.thread_type = 'FRAME'  # Frame-level threading
-            self._codec_ctx.thread_count = 1  # Single thread for lowest latency
-            
-            # Set hardware acceleration (if supported)
+        # Each hardware device is tried in turn; the last resort is software
+        for device_type in self._hw_device_candidates():
             try:
-                if self._hw_accel and self._hw_accel != 'auto':
-                    self._codec_ctx.options = {'hwaccel': self._hw_accel}
-                    print(f"[PyAVDecoder] Hardware acceleration: {self._hw_accel}")
+                self._open_codec(HWAccel(device_type=device_type, allow_software_fallback=True))
             except Exception as e:
-                print(f"[PyAVDecoder] HW accel failed, using software: {e}")
-            
-            # Open codec
-            self._codec_ctx.open()
-            
-            # Send SPS/PPS as extradata to initialize decoder
-            config_data = self._sps + self._pps
-            
-            # Create a packet with config data
-            packet = av.Packet(config_data)
-            
-            # Decode to trigger initialization
-            try:
-                for frame in self._codec_ctx.decode(packet):
-                    # Unlikely to get frames from just SPS/PPS, but handle if we do
-                    self._process_frame(frame)
-            except Exception:
-                pass  # Normal - SPS/PPS don't produce frames
+                print(f"[PyAVDecoder] {device_type} unavailable: {e}")
+                continue
             
             self._running = True
             self._config_ready = True
-            print(f"[PyAVDecoder] Initialized with {self._hw_accel} acceleration")
+            self._hw_accel = device_type
+            print(f"[PyAVDecoder] Initialized with {device_type} acceleration")
             return True
+        
+        return self._initialize_software_decoder()
+    
+    def _open_codec(self, hwaccel: Optional['HWAccel']):
+        """Create and open the H.264 codec context, then feed it SPS/PPS."""
+        codec = av.Codec('h264', 'r')  # 'r' for decoder
+        # Creating the hardware device and opening the codec start FFmpeg
+        # and driver threads; keep them off the core this thread is pinned to
+        with affinity.unpinned():
+            codec_ctx = av.CodecContext.create(codec, hwaccel=hwaccel)
             
-        except Exception as e:
-            print(f"[PyAVDecoder] Initialization failed: {e}")
-            # Try without hardware acceleration
-            return self._initialize_software_decoder()
+            # Configure for low latency
+            codec_ctx.thread_type = 'FRAME'  # Frame-level threading
+            codec_ctx.thread_count = 1  # Single thread for lowest latency
+            codec_ctx.open()
+        self._codec_ctx = codec_ctx
+        
+        # Send SPS/PPS to initialize decoder; hardware frames are downloaded
+        # to system memory (NV12) and converted in _process_frame
+        try:
+            for frame in codec_ctx.decode(av.Packet(self._sps + self._pps)):
+                # Unlikely to get frames from just SPS/PPS, but handle if we do
+                self._process_frame(frame)
+        except Exception:
+            pass  # Normal - SPS/PPS don't produce frames
     
     def _initialize_software_decoder(self) -> bool:
         """Fallback to software decoding."""
         try:
-            codec = av.Codec('h264', 'r')
-            self._codec_ctx = av.CodecContext.create(codec)
-            self._codec_ctx.thread_type = 'FRAME'
-            self._codec_ctx.thread_count = 2  # Allow 2 threads for software
-            self._codec_ctx.open()
-            
-            # Send config
-            if self._sps and self._pps:
-                config_data = self._sps + self._pps
-                packet = av.Packet(config_data)
-                try:
-                    for frame in self._codec_ctx.decode(packet):
-                        self._process_frame(frame)
-                except Exception:
-                    pass
+            self._open_codec(None)
             
             self._running = True
             self._config_ready = True
@@ -229,7 +253,13 @@ class PyAVDecoder:
         Returns:
             YUVFrame if a frame was decoded, None otherwise.
         """
+        h264_data = ensure_start_code(h264_data)
+        
         if not self._running or not self._codec_ctx:
+            # Encoders may send SPS/PPS in-band ahead of the first IDR
+            if not (self._sps and self._pps) and nal_type(h264_data) in (NAL_SPS, NAL_PPS):
+                self._capture_parameter_sets(h264_data)
+            
             # Try to initialize if we have config
             if self._sps and self._pps:
                 if not self._initialize_decoder():
@@ -237,27 +267,51 @@ class PyAVDecoder:
             else:
                 return None
         
-        # Ensure start code
-        if not h264_data.startswith(b'\x00\x00\x00\x01') and not h264_data.startswith(b'\x00\x00\x01'):
-            h264_data = b'\x00\x00\x00\x01' + h264_data
+        # Assemble the access unit: hold non-VCL NALs and submit them with
+        # the next slice as a single packet
+        first_type = nal_type(h264_data)
+        if first_type in (NAL_SEI, NAL_AUD, NAL_SPS, NAL_PPS) and not contains_vcl(h264_data):
+            self._pending_nals += h264_data
+            return None
+        if self._pending_nals:
+            self._pending_nals += h264_data
+            h264_data = bytes(self._pending_nals)
+            self._pending_nals.clear()
         
         try:
+            # Re-send parameter sets with each keyframe so the decoder can
+            # resync after errors; they share the IDR's packet, so the
+            # decoder is entered once per keyframe. Checked on the merged
+            # access unit, which may lead with AUD/SEI or carry SPS/PPS already
+            if has_idr(h264_data) and not has_nal_type(h264_data, (NAL_SPS,)):
+                h264_data = self._sps + self._pps + h264_data
+            
             packet = av.Packet(h264_data)
             
             for frame in self._codec_ctx.decode(packet):
                 return self._process_frame(frame)
                 
         except Exception as e:
-            # Decoder errors are often recoverable (corrupt frame, etc.)
-            if self._frames_decoded == 0:
-                print(f"[PyAVDecoder] Decode error: {e}")
-            return None
-        except Exception as e:
-            print(f"[PyAVDecoder] Unexpected error: {e}")
+            # Decoder errors are often recoverable (corrupt frame, etc.);
+            # a burst of them is counted, not printed one by one
+            self._decode_errors += 1
+            now = time.monotonic()
+            if now - self._last_error_time >= self.ERROR_PRINT_INTERVAL:
+                self._last_error_time = now
+                print(f"[PyAVDecoder] Decode error ({self._decode_errors} total): {e}")
             return None
         
         return None
     
+    def _capture_parameter_sets(self, h264_data: bytes):
+        """Store SPS/PPS NAL units found inside a video payload."""
+        for start, end in find_nal_units(h264_data):
+            unit_type = h264_data[start] & 0x1F
+            if unit_type == NAL_SPS:
+                self._sps = START_CODE + h264_data[start:end]
+            elif unit_type == NAL_PPS:
+                self._pps = START_CODE + h264_data[start:end]
+    
     def _process_frame(self, frame: 'VideoFrame') -> YUVFrame:
         """Convert PyAV VideoFrame to YUVFrame for SDL2."""
         self._frames_decoded += 1
@@ -275,64 +329,46 @@ class PyAVDecoder:
         if frame.format.name != 'yuv420p':
             frame = frame.reformat(format='yuv420p')
         
-        # Use to_ndarray() which handles stride correctly (removes padding)
-        # This produces contiguous pixel data without stride gaps
+        # Copy each plane once into a single contiguous YUV420P buffer,
+        # dropping stride padding through a strided numpy view
+        width = frame.width
+        height = frame.height
+        y_size = width * height
+        uv_size = (width // 2) * (height // 2)
+        data = bytearray(y_size + 2 * uv_size)
+        dst = np.frombuffer(data, dtype=np.uint8)
         try:
-            import numpy as np
-            
-            # Get dimensions
-            width = frame.width
-            height = frame.height
-            
-            # Extract Y plane (full resolution) - handle stride
-            y_plane_data = frame.planes[0]
-            y_stride = y_plane_data.line_size
-            if y_stride == width:
-                # No padding, use directly
-                y_plane = bytes(y_plane_data)[:width * height]
-            else:
-                # Has stride padding, copy row by row
-                y_array = np.frombuffer(bytes(y_plane_data), dtype=np.uint8)
-                y_array = y_array.reshape(height, y_stride)[:, :width]
-                y_plane = y_array.tobytes()
-            
-            # Extract U plane (half resolution)
-            u_plane_data = frame.planes[1]
-            u_stride = u_plane_data.line_size
-            u_width = width // 2
-            u_height = height // 2
-            if u_stride == u_width:
-                u_plane = bytes(u_plane_data)[:u_width * u_height]
-            else:
-                u_array = np.frombuffer(bytes(u_plane_data), dtype=np.uint8)
-                u_array = u_array.reshape(u_height, u_stride)[:, :u_width]
-                u_plane = u_array.tobytes()
-            
-            # Extract V plane (half resolution)
-            v_plane_data = frame.planes[2]
-            v_stride = v_plane_data.line_size
-            v_width = width // 2
-            v_height = height // 2
-            if v_stride == v_width:
-                v_plane = bytes(v_plane_data)[:v_width * v_height]
-            else:
-                v_array = np.frombuffer(bytes(v_plane_data), dtype=np.uint8)
-                v_array = v_array.reshape(v_height, v_stride)[:, :v_width]
-                v_plane = v_array.tobytes()
+            offset = 0
+            for plane, plane_w, plane_h in (
+                (frame.planes[0], width, height),
+                (frame.planes[1], width // 2, height // 2),
+                (frame.planes[2], width // 2, height // 2),
+            ):
+                stride = plane.line_size
+                src = np.frombuffer(plane, dtype=np.uint8, count=stride * plane_h)
+                size = plane_w * plane_h
+                dst[offset:offset + size].reshape(plane_h, plane_w)[:] = (
+                    src.reshape(plane_h, stride)[:, :plane_w]
+                )
+                offset += size
                 
         except Exception as e:
             # Fallback: just use raw bytes (may have stride issues on some systems)
             print(f"[PyAVDecoder] Stride handling failed, using raw: {e}")
-            y_plane = bytes(frame.planes[0])
-            u_plane = bytes(frame.planes[1])
-            v_plane = bytes(frame.planes[2])
+            y_raw, u_raw, v_raw = (bytes(plane) for plane in frame.planes[:3])
+            data = y_raw + u_raw + v_raw
+            y_size = len(y_raw)
+            uv_size = len(u_raw)
+        
+        view = memoryview(data)
         
         yuv_frame = YUVFrame(
-            y_plane=y_plane,
-            u_plane=u_plane,
-            v_plane=v_plane,
+            y_plane=view[:y_size],
+            u_plane=view[y_size:y_size + uv_size],
+            v_plane=view[y_size + uv_size:],
             width=frame.width,
-            height=frame.height
+            height=frame.height,
+            data=data
         )
         
         # Invoke callback
@@ -367,7 +403,9 @@ class PyAVDecoder:
         self._sps = None
         self._pps = None
         self._config_ready = False
+        self._pending_nals.clear()
         self._frames_decoded = 0
+        self._decode_errors = 0
         self._width = 0
         self._height = 0
     
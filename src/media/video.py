@@ -12,6 +12,8 @@ import shutil
 import struct
 from typing import Optional, Callable, Tuple
 
+from src.media.h264 import ensure_start_code
+
 
 class VideoDecoder:
     """
@@ -53,8 +55,9 @@ class VideoDecoder:
     def set_sps(self, sps: bytes):
         """Set Sequence Parameter Set and parse resolution."""
         # Add start code if missing
-        if not sps.startswith(b'\x00\x00\x00\x01') and not sps.startswith(b'\x00\x00\x01'):
-            sps = b'\x00\x00\x00\x01' + sps
+        sps = ensure_start_code(sps)
+        if sps == self._sps and self._running:
+            return  # Same parameters re-sent by the encoder; skip re-parsing
         self._sps = sps
         
         # Parse resolution from SPS
@@ -76,8 +79,9 @@ class VideoDecoder:
                 
     def set_pps(self, pps: bytes):
         """Set Picture Parameter Set."""
-        if not pps.startswith(b'\x00\x00\x00\x01') and not pps.startswith(b'\x00\x00\x01'):
-            pps = b'\x00\x00\x00\x01' + pps
+        pps = ensure_start_code(pps)
+        if pps == self._pps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
         self._pps = pps
         print(f"[VideoDecoder] PPS received: {len(pps)} bytes")
         
@@ -320,18 +324,19 @@ class VideoDecoder:
                 
                 # Extract complete frames from buffer
                 while len(buffer) >= frame_size:
-                    yuv_data = bytes(buffer[:frame_size])
-                    buffer = buffer[frame_size:]
-                    
                     self._frames_decoded += 1
                     
                     if self._frames_decoded == 1:
                         print(f"[VideoDecoder] First frame: {self._width}x{self._height}")
                     elif self._frames_decoded % 60 == 0:
                         print(f"[VideoDecoder] Decoded {self._frames_decoded} frames")
-                        
-                    if self._frame_callback:
-                        self._frame_callback(yuv_data, self._width, self._height)
+                    
+                    # Only copy the frame out when someone will consume it
+                    callback = self._frame_callback
+                    if callback:
+                        callback(bytes(buffer[:frame_size]), self._width, self._height)
+                    
+                    del buffer[:frame_size]
                         
             except Exception as e:
                 if self._running:
@@ -4,4 +4,4 @@ from src.render.window import VideoWindow
 from src.render.audio_output import AudioPlayer
 from src.render.sdl_video import SDLVideoWindow
 
-__all__ = ['VideoWindow', 'AudioPlayer', 'SDLVideoWindow']
+__all__ = ('VideoWindow', 'AudioPlayer', 'SDLVideoWindow')
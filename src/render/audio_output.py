@@ -2,8 +2,8 @@
 Audio output using sounddevice (PortAudio).
 """
 
+from collections import deque
 from typing import Optional
-import queue
 import threading
 import numpy as np
 
@@ -20,10 +20,16 @@ class AudioPlayer:
         self._sample_rate = sample_rate
         self._channels = channels
         self._stream: Optional[sd.OutputStream] = None
-        self._queue: queue.Queue = queue.Queue(maxsize=10)
+        # Bounded SPSC ring; append/popleft are atomic and drop the oldest when full
+        self._queue: deque = deque(maxlen=10)
         self._running = False
         self._thread: Optional[threading.Thread] = None
     
+    @property
+    def sample_rate(self) -> int:
+        """Rate the output stream is opened at."""
+        return self._sample_rate
+    
     def start(self):
         """Start the audio output stream."""
         if sd is None:
@@ -56,54 +62,49 @@ class AudioPlayer:
             self._stream = None
         
         # Clear queue
-        while not self._queue.empty():
-            try:
-                self._queue.get_nowait()
-            except queue.Empty:
-                break
+        self._queue.clear()
     
     def play(self, samples: np.ndarray):
         """Queue audio samples for playback."""
         if not self._running:
             return
         
-        try:
-            self._queue.put_nowait(samples)
-        except queue.Full:
-            # Drop oldest samples if queue is full
-            try:
-                self._queue.get_nowait()
-                self._queue.put_nowait(samples)
-            except (queue.Empty, queue.Full):
-                pass
+        # Normalize here so the realtime callback only has to copy
+        # PyAV returns (channels, samples), sounddevice needs (samples, channels)
+        if samples.ndim == 2:
+            if samples.shape[0] == self._channels and samples.shape[1] > self._channels:
+                # Shape is (channels, samples) - transpose to (samples, channels)
+                samples = samples.T
+        elif samples.ndim == 1:
+            # Mono audio - reshape to (samples, 1)
+            samples = samples.reshape(-1, 1)
+        
+        # Ensure float32 dtype
+        if samples.dtype != np.float32:
+            samples = samples.astype(np.float32)
+        
+        # Oldest samples are dropped automatically if the queue is full
+        self._queue.append(samples)
     
     def _audio_callback(self, outdata: np.ndarray, frames: int, 
                         time_info, status):
         """Callback for sounddevice stream."""
         try:
-            samples = self._queue.get_nowait()
+            samples = self._queue.popleft()
             
-            # PyAV returns (channels, samples), sounddevice needs (samples, channels)
-            if samples.ndim == 2:
-                if samples.shape[0] == self._channels and samples.shape[1] > self._channels:
-                    # Shape is (channels, samples) - transpose to (samples, channels)
-                    samples = samples.T
-            elif samples.ndim == 1:
-                # Mono audio - reshape to (samples, 1)
-                samples = samples.reshape(-1, 1)
-            
-            # Ensure float32 dtype
-            if samples.dtype != np.float32:
-                samples = samples.astype(np.float32)
+            # Fast path: steady-state blocks fit the output exactly
+            num_samples = samples.shape[0]
+            if num_samples == frames:
+                outdata[:] = samples
+                return
             
             # Fill output buffer
-            num_samples = samples.shape[0]
-            if num_samples >= frames:
+            if num_samples > frames:
                 outdata[:] = samples[:frames]
             else:
                 outdata[:num_samples] = samples
                 outdata[num_samples:] = 0
-        except queue.Empty:
+        except IndexError:
             # No data, output silence
             outdata.fill(0)
         except Exception as e:
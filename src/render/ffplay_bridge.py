@@ -3,31 +3,104 @@ FFplay Bridge - Low-latency video player using FFplay subprocess.
 Uses ffplay from C:\\ffmpeg for simpler, more reliable playback.
 """
 
+import functools
 import os
 import shutil
 import subprocess
-import threading
+import sys
 from typing import Optional
 
+from src.render.gpu import DXVA2, INTEL, NONE, NVIDIA, detect_gpu_vendor, hw_accel_override
+from src.render.pipes import write_all
+from src.render.player_process import PlayerProcess
+
+
+def _locate_ffplay() -> Optional[str]:
+    paths = [
+        r"C:\ffmpeg\bin\ffplay.exe",
+        "ffplay.exe",
+    ]
+    
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    
+    return shutil.which('ffplay')
+
+
+# Resolved once at import; PATH walks are slow on Windows
+_FFPLAY_PATH = _locate_ffplay()
+
+
+def refresh_ffplay_path() -> Optional[str]:
+    """Re-probe for ffplay (e.g. after it was installed) and update the cache."""
+    global _FFPLAY_PATH
+    _FFPLAY_PATH = _locate_ffplay()
+    return _FFPLAY_PATH
+
+
+@functools.lru_cache(maxsize=4)
+def _ffplay_decoders(ffplay_path: str) -> frozenset:
+    """Return the decoder names compiled into an ffplay build (probed once per path)."""
+    try:
+        result = subprocess.run(
+            [ffplay_path, '-hide_banner', '-decoders'],
+            capture_output=True, text=True, timeout=5
+        )
+    except Exception as e:
+        print(f"[FFplayBridge] Decoder probe failed: {e}")
+        return frozenset()
+    
+    # Lines look like " V....D h264_cuvid           Nvidia CUVID H264 decoder"
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and len(parts[0]) == 6:
+            names.add(parts[1])
+    return frozenset(names)
+
 
 class FFplayBridge:
     """FFplay subprocess for low-latency H.264 playback."""
     
-    FFPLAY_FLAGS = [
-        # Input
+    INPUT_FLAGS = [
         '-f', 'h264',
         '-flags', 'low_delay',
+        '-avioflags', 'direct',  # No AVIOContext read buffering on the pipe
         '-fflags', 'nobuffer',
         '-probesize', '32',
         '-analyzeduration', '0',
-        
-        # Use DXVA2 (DirectX 9, works on Intel HD 4000)
-        # FFplay's Vulkan renderer is broken, so use dxva2 output
+        '-max_delay', '0',
+    ]
+    
+    # Dedicated decoders skip FFmpeg's hwaccel layer and its reorder queue
+    NVIDIA_DECODER_FLAGS = [
+        '-vcodec', 'h264_cuvid',
+        '-surfaces', '4',  # Cap CUVID's internal frame queue (default 25)
+    ]
+    INTEL_DECODER_FLAGS = [
+        '-vcodec', 'h264_qsv',
+        '-async_depth', '1',
+    ]
+    # Use DXVA2 (DirectX 9, works on Intel HD 4000)
+    # FFplay's Vulkan renderer is broken, so use dxva2 output
+    DEFAULT_DECODER_FLAGS = [
         '-hwaccel', 'dxva2',
         '-hwaccel_output_format', 'dxva2_vld',
-        
-        # Display
-        '-vf', 'hwdownload,format=nv12,format=yuv420p',  # Convert from DXVA to SDL
+        '-vf', 'hwdownload,format=nv12',  # SDL renders NV12 textures natively
+    ]
+    MACOS_DECODER_FLAGS = [
+        '-hwaccel', 'videotoolbox',
+        '-hwaccel_output_format', 'videotoolbox_vld',
+        '-vf', 'hwdownload,format=nv12',
+    ]
+    LINUX_DECODER_FLAGS = [
+        '-hwaccel', 'vaapi',
+        '-hwaccel_output_format', 'vaapi',
+        '-vf', 'hwdownload,format=nv12',
+    ]
+    
+    DISPLAY_FLAGS = [
         '-sync', 'ext',
         '-framedrop',
         '-fast',
@@ -41,27 +114,56 @@ class FFplayBridge:
         # No audio
         '-an',
         
-        # Input from stdin
-        '-i', 'pipe:0',
+        # Only warnings on stderr (keeps _read_stderr quiet)
+        '-loglevel', 'warning',
     ]
     
     def __init__(self, ffplay_path: Optional[str] = None):
         self._ffplay_path = ffplay_path or self._find_ffplay()
+        self._player = PlayerProcess('FFplay')
         self._process: Optional[subprocess.Popen] = None
+        self._stdin_fd: Optional[int] = None
         self._running = False
-        self._stderr_thread: Optional[threading.Thread] = None
         
     def _find_ffplay(self) -> Optional[str]:
-        paths = [
-            r"C:\ffmpeg\bin\ffplay.exe",
-            "ffplay.exe",
-        ]
+        return _FFPLAY_PATH or refresh_ffplay_path()
+    
+    def _platform_decoder_flags(self) -> list:
+        """Return the generic hwaccel flags for this OS (used when no vendor decoder applies)."""
+        if sys.platform == 'darwin':
+            return self.MACOS_DECODER_FLAGS
+        if sys.platform.startswith('linux'):
+            return self.LINUX_DECODER_FLAGS
+        return self.DEFAULT_DECODER_FLAGS
+    
+    def _build_ffplay_command(self) -> list:
+        """Build the ffplay command, picking the decoder for the detected GPU."""
+        vendor = hw_accel_override() or detect_gpu_vendor()
+        if vendor == NONE:
+            decoder_flags = []  # Software decoding
+        elif vendor == NVIDIA:
+            decoder_flags = self.NVIDIA_DECODER_FLAGS
+        elif vendor == INTEL:
+            decoder_flags = self.INTEL_DECODER_FLAGS
+        elif vendor == DXVA2:
+            decoder_flags = self.DEFAULT_DECODER_FLAGS
+        else:
+            decoder_flags = self._platform_decoder_flags()
         
-        for path in paths:
-            if os.path.exists(path):
-                return path
+        # Fall back to the generic hwaccel if this ffplay build lacks the decoder
+        if decoder_flags[:1] == ['-vcodec']:
+            decoder = decoder_flags[1]
+            if decoder not in _ffplay_decoders(self._ffplay_path):
+                decoder_flags = self._platform_decoder_flags()
+                print(f"[FFplayBridge] {decoder} unavailable, using -hwaccel {decoder_flags[1]}")
         
-        return shutil.which('ffplay')
+        return (
+            [self._ffplay_path]
+            + self.INPUT_FLAGS
+            + decoder_flags
+            + self.DISPLAY_FLAGS
+            + ['-i', 'pipe:0']  # Input from stdin
+        )
     
     def start(self) -> bool:
         if self._running:
@@ -74,26 +176,16 @@ class FFplayBridge:
         print(f"[FFplayBridge] Starting: {self._ffplay_path}")
         
         try:
-            cmd = [self._ffplay_path] + self.FFPLAY_FLAGS
+            cmd = self._build_ffplay_command()
             
             # Don't use CREATE_NO_WINDOW - ffplay needs a window!
-            self._process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                bufsize=0,
-            )
+            self._process = self._player.start(cmd)
             
+            # Raw fd bypasses the BufferedWriter lock on every write
+            self._stdin_fd = self._player.stdin_fd
             self._running = True
             print(f"[FFplayBridge] Started (PID: {self._process.pid})")
             
-            self._stderr_thread = threading.Thread(
-                target=self._read_stderr,
-                daemon=True
-            )
-            self._stderr_thread.start()
-            
             return True
             
         except Exception as e:
@@ -101,11 +193,12 @@ class FFplayBridge:
             return False
     
     def write(self, data: bytes) -> bool:
-        if not self._running or not self._process or not self._process.stdin:
+        fd = self._stdin_fd
+        if not self._running or fd is None:
             return False
         
         try:
-            self._process.stdin.write(data)
+            write_all(fd, (data,))
             return True
         except (BrokenPipeError, OSError) as e:
             print(f"[FFplayBridge] Write error: {e}")
@@ -119,38 +212,12 @@ class FFplayBridge:
             except Exception:
                 pass
     
-    def _read_stderr(self):
-        while self._running and self._process:
-            try:
-                line = self._process.stderr.readline()
-                if line:
-                    msg = line.decode('utf-8', errors='ignore').strip()
-                    if msg:
-                        print(f"[FFplay] {msg}")
-                else:
-                    if self._process.poll() is not None:
-                        print(f"[FFplayBridge] Exited: {self._process.poll()}")
-                        break
-            except Exception:
-                break
-    
     def stop(self):
         self._running = False
+        self._stdin_fd = None
         
-        if self._process:
-            try:
-                self._process.stdin.close()
-            except Exception:
-                pass
-            try:
-                self._process.terminate()
-                self._process.wait(timeout=2.0)
-            except Exception:
-                try:
-                    self._process.kill()
-                except Exception:
-                    pass
-            self._process = None
+        self._player.stop()
+        self._process = None
         
         print("[FFplayBridge] Stopped")
     
@@ -5,11 +5,98 @@ Uses mpv subprocess for hardware-accelerated decode and display.
 mpv has superior hardware acceleration support compared to FFplay.
 """
 
+import functools
+import queue
 import subprocess
 import shutil
 import threading
+import time
+import traceback
+from collections import deque
 from typing import Optional
 
+from src.media.h264 import (
+    NAL_IDR,
+    NAL_PPS,
+    NAL_SPS,
+    ensure_start_code,
+    has_idr,
+    has_nal_type,
+    is_disposable,
+)
+from src.render.gpu import (
+    AMD,
+    DXVA2,
+    INTEL,
+    NONE,
+    NVIDIA,
+    detect_gpu_vendor,
+    hw_accel_override,
+)
+from src.render.pipes import write_all
+from src.render.player_process import PlayerProcess
+
+
+# Resolved once at import; PATH walks are slow on Windows
+_MPV_PATH = shutil.which('mpv')
+
+
+def refresh_mpv_path() -> Optional[str]:
+    """Re-probe PATH for mpv (e.g. after it was installed) and update the cache."""
+    global _MPV_PATH
+    _MPV_PATH = shutil.which('mpv')
+    return _MPV_PATH
+
+
+# User-space stdin buffer; bursts coalesce here until the writer flushes
+STDIN_BUFFER_SIZE = 1 << 20
+
+# NAL types after which mpv needs data promptly (new GOP or config)
+_REFRESH_NAL_TYPES = (NAL_IDR, NAL_SPS, NAL_PPS)
+_CONFIG_NAL_TYPES = (NAL_SPS, NAL_PPS)
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_hw() -> str:
+    """Pick the mpv hwdec for the installed GPU; cached for the process lifetime."""
+    vendor = hw_accel_override() or detect_gpu_vendor()
+    
+    # Comma lists let mpv fall back when the preferred backend can't
+    # handle the stream, instead of dropping straight to software decode
+    if vendor == NONE:
+        return 'no'  # Software decoding
+    elif vendor == DXVA2:
+        return 'dxva2,auto-safe'
+    elif vendor == NVIDIA:
+        return 'nvdec,d3d11va,auto-safe'  # mpv's NVIDIA decoder
+    elif vendor in (INTEL, AMD):
+        return 'd3d11va,auto-safe'  # mpv handles this better than FFplay
+    
+    # Unknown GPU: let mpv probe, limited to its whitelist of reliable backends
+    print("[mpv] Using auto-detection")
+    return 'auto-safe'
+
+
+@functools.lru_cache(maxsize=4)
+def _mpv_video_outputs(mpv_path: str) -> frozenset:
+    """Return the video outputs compiled into an mpv build (probed once per path)."""
+    try:
+        result = subprocess.run(
+            [mpv_path, '--vo=help'],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=5
+        )
+    except Exception as e:
+        print(f"[mpv] Video output probe failed: {e}")
+        return frozenset()
+    
+    # Lines look like "  gpu-next         Video output based on libplacebo"
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if parts and line.startswith(' '):
+            names.add(parts[0])
+    return frozenset(names)
+
 
 class FFplayVideo:
     """
@@ -20,9 +107,73 @@ class FFplayVideo:
     Works better than FFplay for DirectX/Windows environments.
     """
     
+    # Fixed attribute layout: per-frame lookups skip the instance __dict__
+    __slots__ = (
+        '_title', '_process', '_stdin_fd', '_running', '_ready',
+        '_width', '_height', '_sps', '_pps', '_config_blob', '_config_sent',
+        '_writer_thread', '_player',
+        '_max_buffer_size', '_frame_buffer', '_lock', '_write_queue',
+        '_await_idr', '_last_discard', '_last_arrival', '_arrivals',
+    )
+    
+    # Fixed mpv flags; only the hwdec and title vary per start()
+    MPV_FLAGS = [
+        # === HARDWARE ACCELERATION ===
+        '--hwdec-codecs=h264',  # Only use hwdec for H.264
+        
+        # === LOW LATENCY SETTINGS ===
+        '--profile=low-latency',  # Built-in low-latency profile
+        '--no-cache',  # Disable cache for real-time streaming
+        '--untimed',  # Don't sync to system clock
+        '--no-demuxer-thread',  # No separate demuxer thread
+        # Software fallback may use every core, but only via slice threads:
+        # frame threads would add one frame of delay per extra thread
+        '--vd-lavc-threads=0',
+        '--vd-lavc-o=thread_type=slice',
+        
+        # === DEMUXER SETTINGS ===
+        '--demuxer=h264',  # H.264 elementary stream demuxer
+        '--demuxer-lavf-format=h264',  # Force H.264 format
+        '--demuxer-lavf-analyzeduration=0.1',  # Quick analysis
+        '--demuxer-lavf-probesize=32768',  # Small probe (32KB)
+        
+        # === VIDEO OUTPUT ===
+        '--gpu-api=d3d11',  # Use Direct3D 11 on Windows
+        '--gpu-context=win',  # Windows context
+        
+        # === WINDOW SETTINGS ===
+        '--ontop',  # Always on top
+        '--no-border',  # Borderless for cleaner look
+        '--autofit=30%',  # Start at 30% of screen size
+        '--keepaspect',  # Maintain aspect ratio
+        
+        # === PLAYBACK SETTINGS ===
+        '--no-audio',  # Disable audio (handled separately)
+        '--no-osc',  # No on-screen controller
+        '--no-osd-bar',  # No OSD progress bar
+        '--cursor-autohide=100',  # Hide cursor after 100ms
+        
+        # === PERFORMANCE ===
+        '--video-sync=desync',  # Present as soon as decoded, like MPVBridge
+        '--interpolation=no',  # No frame interpolation
+        '--framedrop=vo',  # Drop frames if behind
+        
+        # === DEBUG ===
+        '--msg-level=all=warn',  # Warnings and errors only
+    ]
+    
+    STDERR_PRINT_INTERVAL = 0.25  # Seconds between batched stderr prints
+    COALESCE_WINDOW = 0.001  # Seconds the writer waits for follow-up NALs
+    DISCARD_FILL_RATIO = 0.6  # Pre-roll fill level that starts progressive discard
+    DISCARD_INTERVAL = 0.2  # Minimum seconds between progressive discards
+    JITTER_WINDOW = 120  # decode() arrivals kept for sizing mpv's demuxer buffer
+    DEMUXER_MAX_BYTES = 2 * 1024 * 1024  # Default/minimum (~1 second at 25fps)
+    DEMUXER_READAHEAD_SECS = 0.1  # Default until arrivals have been measured
+    
     def __init__(self, title: str = "Wolfkrypt Mirror"):
         self._title = title
         self._process: Optional[subprocess.Popen] = None
+        self._stdin_fd: Optional[int] = None  # Raw fd for unbuffered steady-state writes
         self._running = False
         self._ready = False  # True when mpv has received SPS/PPS and is ready
         self._width = 0
@@ -31,117 +182,76 @@ class FFplayVideo:
         # SPS/PPS for decoder initialization
         self._sps: Optional[bytes] = None
         self._pps: Optional[bytes] = None
+        self._config_blob: Optional[bytes] = None  # SPS+PPS, built once per change
         self._config_sent = False
         
         self._writer_thread: Optional[threading.Thread] = None
-        self._stderr_thread: Optional[threading.Thread] = None
-        
-        # Frame counter for periodic flush (every 3 frames with hardware decode)
-        self._frame_count = 0
-        self._flush_interval = 3  # Lower interval with hardware decode
+        self._player = PlayerProcess('mpv', print_interval=self.STDERR_PRINT_INTERVAL)
         
         # Buffer for frames received before mpv is ready (max 20 frames with hardware decode)
-        self._frame_buffer = []
         self._max_buffer_size = 20  # Larger buffer for USB jitter absorption
-        self._lock = threading.Lock()
+        self._frame_buffer: deque = deque(maxlen=self._max_buffer_size)  # Evicts oldest when full
+        self._lock = threading.Lock()  # Serializes _flush_buffer() and stop() only
         
-    def _detect_hardware_accel(self) -> str:
-        """Detect available hardware acceleration."""
-        import platform
+        # Frames waiting for the writer thread (decode() never blocks on the pipe)
+        # SimpleQueue is a C-level FIFO with no Condition bookkeeping per put/get;
+        # _enqueue() enforces the _max_buffer_size bound itself
+        self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._await_idr = False  # Backlog was dropped; skip frames until the next IDR
+        self._last_discard = 0.0  # monotonic time of the last progressive discard
         
-        if platform.system() != 'Windows':
-            return 'auto'
+        # (gap seconds, bytes) per decode() call; sizes the demuxer on (re)start
+        self._last_arrival = 0.0
+        self._arrivals: deque = deque(maxlen=self.JITTER_WINDOW)
         
-        # Check for NVIDIA GPU
-        try:
-            result = subprocess.run(
-                ['wmic', 'path', 'win32_VideoController', 'get', 'name'],
-                capture_output=True, text=True, timeout=2
-            )
-            gpu_info = result.stdout.lower()
-            
-            if 'nvidia' in gpu_info:
-                print("[mpv] NVIDIA GPU detected")
-                return 'nvdec'  # mpv's NVIDIA decoder
-            elif 'intel' in gpu_info:
-                print("[mpv] Intel GPU detected")
-                return 'd3d11va'  # mpv handles this better than FFplay
-            elif 'amd' in gpu_info or 'radeon' in gpu_info:
-                print("[mpv] AMD GPU detected")
-                return 'd3d11va'
-        except Exception as e:
-            print(f"[mpv] GPU detection failed: {e}")
-        
-        # Default to auto (mpv is smarter at detecting)
-        print("[mpv] Using auto-detection")
-        return 'auto'
+    def _detect_hardware_accel(self) -> str:
+        """Detect available hardware acceleration (probed once per process)."""
+        return _detect_hw()
     
     def _build_mpv_command(self, mpv_path: str, hw_accel: str) -> list:
         """Build mpv command with appropriate hardware acceleration."""
-        
-        cmd = [
+        # gpu-next (libplacebo) where the build has it, else the classic GPU output
+        vo = 'gpu-next' if 'gpu-next' in _mpv_video_outputs(mpv_path) else 'gpu'
+        return [
             mpv_path,
-            
-            # Input from stdin
-            '-',
-            
-            # === HARDWARE ACCELERATION ===
+            '-',  # Input from stdin
             f'--hwdec={hw_accel}',  # Hardware decoding
-            '--hwdec-codecs=h264',  # Only use hwdec for H.264
-            
-            # === LOW LATENCY SETTINGS ===
-            '--profile=low-latency',  # Built-in low-latency profile
-            '--no-cache',  # Disable cache for real-time streaming
-            '--untimed',  # Don't sync to system clock
-            '--no-demuxer-thread',  # No separate demuxer thread
-            '--vd-lavc-threads=1',  # Single decode thread for lowest latency
-            '--opengl-glfinish=yes',  # Force GL finish for immediate display
-            '--opengl-swapinterval=0',  # No vsync delay
-            
-            # === DEMUXER SETTINGS ===
-            '--demuxer=h264',  # H.264 elementary stream demuxer
-            '--demuxer-lavf-format=h264',  # Force H.264 format
-            '--demuxer-lavf-analyzeduration=0.1',  # Quick analysis
-            '--demuxer-lavf-probesize=32768',  # Small probe (32KB)
-            
-            # === VIDEO OUTPUT ===
-            '--vo=gpu',  # GPU-based video output (best for hw accel)
-            '--gpu-api=d3d11',  # Use Direct3D 11 on Windows
-            '--gpu-context=win',  # Windows context
-            
-            # === WINDOW SETTINGS ===
+            f'--vo={vo}',
             f'--title={self._title}',
-            '--ontop',  # Always on top
-            '--no-border',  # Borderless for cleaner look
-            '--autofit=30%',  # Start at 30% of screen size
-            '--keepaspect',  # Maintain aspect ratio
-            
-            # === PLAYBACK SETTINGS ===
-            '--no-audio',  # Disable audio (handled separately)
-            '--no-osc',  # No on-screen controller
-            '--no-osd-bar',  # No OSD progress bar
-            '--cursor-autohide=100',  # Hide cursor after 100ms
-            
-            # === INPUT SETTINGS ===
-            '--demuxer-max-bytes=2M',  # Small buffer (2MB for ~1 second at 25fps)
-            '--demuxer-readahead-secs=0.1',  # Minimal readahead
-            
-            # === PERFORMANCE ===
-            '--video-sync=display-desync',  # Don't sync to display refresh
-            '--interpolation=no',  # No frame interpolation
-            '--framedrop=vo',  # Drop frames if behind
-            
-            # === DEBUG ===
-            '--msg-level=all=info',  # Info logging
-        ]
+        ] + self._demuxer_flags() + self.MPV_FLAGS
+    
+    def _demuxer_flags(self) -> list:
+        """
+        Size mpv's demuxer buffer from measured USB jitter.
         
-        return cmd
+        Uses the 95th-percentile gap G between decode() calls: readahead covers
+        1.5 * G and the byte cap holds 4 * G seconds of stream. Falls back to
+        the fixed defaults until enough arrivals have been seen (the first
+        start); later restarts of the same player use the measurements.
+        """
+        arrivals = list(self._arrivals)
+        if len(arrivals) < self.JITTER_WINDOW // 4:
+            max_bytes = self.DEMUXER_MAX_BYTES
+            readahead = self.DEMUXER_READAHEAD_SECS
+        else:
+            gaps = sorted(gap for gap, _ in arrivals)
+            p95_gap = gaps[int(len(gaps) * 0.95) - 1]
+            total_time = sum(gaps) or 1e-3
+            byte_rate = sum(size for _, size in arrivals) / total_time
+            max_bytes = max(self.DEMUXER_MAX_BYTES, int(4 * byte_rate * p95_gap))
+            readahead = max(0.01, round(1.5 * p95_gap, 3))
+        return [
+            f'--demuxer-max-bytes={max_bytes}',
+            f'--demuxer-readahead-secs={readahead}',
+        ]
     
     def set_sps(self, sps: bytes):
         """Set Sequence Parameter Set."""
-        if not sps.startswith(b'\x00\x00\x00\x01') and not sps.startswith(b'\x00\x00\x01'):
-            sps = b'\x00\x00\x00\x01' + sps
+        sps = ensure_start_code(sps)
+        if sps == self._sps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
         self._sps = sps
+        self._config_blob = None
         print(f"[mpv] SPS: {len(sps)} bytes")
         
         # Start if we have both SPS and PPS
@@ -150,9 +260,11 @@ class FFplayVideo:
             
     def set_pps(self, pps: bytes):
         """Set Picture Parameter Set."""
-        if not pps.startswith(b'\x00\x00\x00\x01') and not pps.startswith(b'\x00\x00\x01'):
-            pps = b'\x00\x00\x00\x01' + pps
+        pps = ensure_start_code(pps)
+        if pps == self._pps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
         self._pps = pps
+        self._config_blob = None
         print(f"[mpv] PPS: {len(pps)} bytes")
         
         # Start mpv now that we have both SPS and PPS
@@ -162,13 +274,33 @@ class FFplayVideo:
                 # This prevents overwhelming mpv during initialization
                 print(f"[mpv] {len(self._frame_buffer)} frames buffered, will send gradually")
     
+    def set_config(self, sps: bytes, pps: bytes):
+        """Set SPS and PPS together, starting mpv at most once."""
+        sps = ensure_start_code(sps)
+        pps = ensure_start_code(pps)
+        if sps == self._sps and pps == self._pps and self._running:
+            return  # Same parameters re-sent by the encoder; nothing to reconfigure
+        self._sps = sps
+        self._pps = pps
+        self._config_blob = None
+        print(f"[mpv] SPS/PPS: {len(sps)}/{len(pps)} bytes")
+        
+        if not self._running:
+            self.start()
+    
+    def _get_config_blob(self) -> bytes:
+        """Return SPS+PPS as one contiguous buffer, concatenated once per change."""
+        if self._config_blob is None:
+            self._config_blob = self._sps + self._pps
+        return self._config_blob
+    
     def start(self) -> bool:
         """Start mpv subprocess with hardware acceleration detection."""
         if self._running:
             return True
             
-        # Check if mpv is available
-        mpv_path = shutil.which('mpv')
+        # Check if mpv is available (re-probe only if it was missing at import)
+        mpv_path = _MPV_PATH or refresh_mpv_path()
         if not mpv_path:
             print("[mpv] ERROR: mpv not found in PATH")
             print("[mpv] Please install mpv: https://mpv.io/installation/")
@@ -186,33 +318,26 @@ class FFplayVideo:
         print(f"[mpv] Command: {' '.join(cmd)}")
         
         try:
-            self._process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                bufsize=0
-            )
+            # Buffered stdin; the writer flushes at frame boundaries
+            self._process = self._player.start(cmd, bufsize=STDIN_BUFFER_SIZE)
+            self._stdin_fd = self._player.stdin_fd
             print(f"[mpv] Started (PID: {self._process.pid})")
             print(f"[mpv] Stdin fileno after start: {self._process.stdin.fileno()}")
             print(f"[mpv] Stdin mode: {self._process.stdin.mode if hasattr(self._process.stdin, 'mode') else 'N/A'}")
             
         except Exception as e:
-            import traceback
             print(f"[mpv] Failed to start: {e}")
             traceback.print_exc()
             self._running = False
             return False
             
-        # Start stderr reader
-        self._stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
-        self._stderr_thread.start()
+        # Start pipe writer
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
         
-        # Give mpv a moment to initialize
-        import time
-        time.sleep(0.1)  # 100ms for mpv initialization
-        
-        # Check if mpv is still running
+        # No readiness handshake needed: the stdin pipe holds SPS/PPS and early
+        # frames until mpv's demuxer attaches, so config goes out right away.
+        # A later exit (e.g. bad arguments) is reported by the stderr reader
         poll_result = self._process.poll()
         if poll_result is not None:
             print(f"[mpv] ERROR: Process died during initialization with exit code: {poll_result}")
@@ -247,33 +372,20 @@ class FFplayVideo:
             
         try:
             if self._process and self._process.stdin:
-                # Send SPS and PPS as separate NAL units
-                print("[mpv] Writing SPS...")
-                bytes_written = self._process.stdin.write(self._sps)
-                print(f"[mpv] SPS write returned: {bytes_written}")
-                
-                print("[mpv] Writing PPS...")
-                bytes_written = self._process.stdin.write(self._pps)
-                print(f"[mpv] PPS write returned: {bytes_written}")
-                
-                # Flush immediately to ensure mpv gets config
-                print("[mpv] Flushing stdin...")
-                self._process.stdin.flush()
-                print("[mpv] Flush complete")
+                # Send SPS and PPS in a single syscall
+                print("[mpv] Writing SPS/PPS...")
+                config = self._get_config_blob()
+                write_all(self._stdin_fd, (config,))
+                print(f"[mpv] SPS/PPS written: {len(config)} bytes")
                 
                 self._config_sent = True
                 print("[mpv] Sent SPS/PPS config successfully")
-                # Reset frame count after config
-                self._frame_count = 0
                 
-                # mpv initializes faster than FFplay
-                import time
-                time.sleep(0.05)  # 50ms for mpv to set up video pipeline
+                # mpv queues stdin data itself, so frames can follow immediately
                 self._ready = True
                 print("[mpv] Ready for video frames")
                 
         except Exception as e:
-            import traceback
             print(f"[mpv] Config send error: {e}")
             print(f"[mpv] Error type: {type(e).__name__}")
             print(f"[mpv] Traceback:")
@@ -282,119 +394,199 @@ class FFplayVideo:
             
     def decode(self, h264_data: bytes):
         """Send H.264 data to mpv for decoding and display."""
+        frame_buffer = self._frame_buffer
+        
+        now = time.monotonic()
+        if self._last_arrival:
+            self._arrivals.append((now - self._last_arrival, len(h264_data)))
+        self._last_arrival = now
+        
         # Buffer frames if mpv not ready yet
+        # No lock: decode() is the only producer, and single deque
+        # append/popleft calls are atomic under the GIL
         if not self._ready:
-            with self._lock:
-                # Only buffer if we have SPS/PPS (otherwise frames are useless)
-                if self._sps and self._pps:
-                    # Keep buffer small to avoid latency
-                    if len(self._frame_buffer) < self._max_buffer_size:
-                        self._frame_buffer.append(h264_data)
-                    else:
-                        # Drop oldest frame to make room
-                        self._frame_buffer.pop(0)
-                        self._frame_buffer.append(h264_data)
+            # Only buffer if we have SPS/PPS (otherwise frames are useless)
+            if self._sps and self._pps:
+                if len(frame_buffer) > self.DISCARD_FILL_RATIO * self._max_buffer_size:
+                    self._discard_one(frame_buffer)
+                # Bounded deque drops the oldest frame to keep latency low
+                frame_buffer.append(h264_data)
             return
         
-        # Send buffered frames first (one per call to avoid overwhelming mpv)
-        with self._lock:
-            if self._frame_buffer:
-                buffered_frame = self._frame_buffer.pop(0)
-                try:
-                    if self._process and self._process.stdin:
-                        self._process.stdin.write(buffered_frame)
-                except Exception as e:
-                    print(f"[mpv] Buffer send error: {e}")
-                    self._running = False
-                    self._ready = False
+        # After an overflow, P-frames reference pictures mpv never got
+        if self._await_idr:
+            if has_idr(h264_data):
+                self._await_idr = False
+                print("[mpv] IDR received, resuming")
+            elif not has_nal_type(h264_data, _CONFIG_NAL_TYPES):
+                return
+        
+        # Send one buffered frame ahead of the current one per call to avoid
+        # overwhelming mpv; both go out as one queue item, without concatenating
+        chunks = (h264_data,)
+        if frame_buffer:
+            try:
+                chunks = (frame_buffer.popleft(), h264_data)
+            except IndexError:
+                pass  # Drained concurrently by _flush_buffer()/stop()
+        
+        self._enqueue(chunks)
+    
+    def _discard_one(self, frame_buffer: deque):
+        """
+        Drop the oldest non-reference frame from the pre-roll buffer.
+        
+        Discards are spread out (at most one per DISCARD_INTERVAL) so the
+        buffer drains gradually instead of losing a block of frames, and
+        IDR/SPS/PPS and reference slices are never touched.
+        """
+        now = time.monotonic()
+        if now - self._last_discard < self.DISCARD_INTERVAL:
+            return
+        try:
+            for index, data in enumerate(frame_buffer):
+                if is_disposable(data):
+                    del frame_buffer[index]
+                    self._last_discard = now
                     return
-                
-        if not self._process or not self._process.stdin:
+        except (IndexError, RuntimeError):
+            pass  # Buffer cleared concurrently by stop()
+    
+    def _enqueue(self, chunks: tuple):
+        """
+        Hand chunks to the writer thread without blocking.
+        
+        A full queue means the writer is stalled on a full pipe. The queued
+        frames then only add latency, and dropping a single one would break
+        the references of those after it, so the whole backlog is discarded
+        and decoding resumes cleanly at the next IDR.
+        """
+        write_queue = self._write_queue
+        if write_queue.qsize() < self._max_buffer_size:
+            write_queue.put(chunks)
             return
-            
-        # Send current H.264 data
+        
+        self._clear_write_queue()
+        if any(has_idr(data) for data in chunks):
+            write_queue.put(chunks)
+        elif not self._await_idr:
+            self._await_idr = True
+            print("[mpv] Pipe backed up, dropping frames until the next IDR")
+    
+    def _clear_write_queue(self):
+        """Discard everything queued for the writer thread."""
+        get_nowait = self._write_queue.get_nowait
         try:
-            self._process.stdin.write(h264_data)
+            while True:
+                get_nowait()
+        except queue.Empty:
+            pass
+    
+    def _writer_loop(self):
+        """Writer thread - sends queued H.264 data to mpv stdin."""
+        # Hoisted lookups for the per-frame loop
+        get = self._write_queue.get
+        queue_empty = self._write_queue.empty
+        fd = self._stdin_fd
+        coalesce_window = self.COALESCE_WINDOW
+        # The process outlives this thread: stop() joins it before teardown
+        process = self._process
+        stdin = process.stdin if process else None
+        if not stdin:
+            return
+        stdin_write = stdin.write
+        stdin_flush = stdin.flush
+        
+        pending = False  # Unflushed bytes in the stdin buffer
+        while self._running:
+            try:
+                chunks = get(timeout=0.1)
+            except queue.Empty:
+                chunks = None
             
-            # Periodic flush to reduce latency while maintaining throughput
-            # Flush every N frames (balance between latency and CPU overhead)
-            self._frame_count += 1
-            if self._frame_count >= self._flush_interval:
-                self._process.stdin.flush()
-                self._frame_count = 0
-        except (BrokenPipeError, OSError) as e:
-            print(f"[mpv] Pipe error: {e}")
-            self._running = False
-            self._ready = False
+            try:
+                if chunks is None:
+                    # The chunks that would have flushed these bytes can be
+                    # dropped by _enqueue while awaiting an IDR; send them now
+                    if pending:
+                        stdin_flush()
+                        pending = False
+                    continue
+                
+                # Give NALs of the same frame a short window to arrive so they
+                # leave in one write; a lone frame goes straight to the fd
+                if not pending and len(chunks) == 1:
+                    try:
+                        chunks += get(timeout=coalesce_window)
+                    except queue.Empty:
+                        write_all(fd, chunks)
+                        continue
+                
+                # One bytes.find scan per chunk for IDR/SPS/PPS
+                refresh_point = False
+                for data in chunks:
+                    if has_nal_type(data, _REFRESH_NAL_TYPES):
+                        refresh_point = True
+                        break
+                
+                # Flush on decoder refresh points, or once a burst is drained
+                # so queued frames coalesce into one syscall without waiting
+                flush_now = refresh_point or queue_empty()
+                if flush_now and not pending:
+                    # Nothing buffered ahead: scatter-gather straight to the fd
+                    write_all(fd, chunks)
+                    continue
+                
+                # Otherwise chunks land in the stdin buffer and leave on flush
+                for data in chunks:
+                    stdin_write(data)
+                if flush_now:
+                    stdin_flush()
+                    pending = False
+                else:
+                    pending = True
+            except (BrokenPipeError, OSError) as e:
+                print(f"[mpv] Pipe error: {e}")
+                self._running = False
+                self._ready = False
+                break
             
     def _flush_buffer(self):
-        """Send buffered frames to mpv after it's ready."""
+        """Send buffered frames to mpv after it's ready, as a single queue item."""
         with self._lock:
             if not self._frame_buffer:
                 return
             
             print(f"[mpv] Flushing {len(self._frame_buffer)} buffered frames")
-            for frame_data in self._frame_buffer:
-                try:
-                    if self._process and self._process.stdin:
-                        self._process.stdin.write(frame_data)
-                except Exception as e:
-                    print(f"[mpv] Buffer flush error: {e}")
-                    break
+            # popleft() rather than iterating: decode() may append concurrently
+            frames = []
+            while self._frame_buffer:
+                frames.append(self._frame_buffer.popleft())
             
-            # Clear buffer and flush pipe
-            self._frame_buffer.clear()
-            try:
-                if self._process and self._process.stdin:
-                    self._process.stdin.flush()
-            except Exception:
-                pass
+            # Through the writer thread so it never interleaves with decode() data.
+            # Frames are copied once, straight into the stdin buffer, rather than
+            # joined into a temporary bytes object first
+            self._enqueue(tuple(frames))
     
-    def _read_stderr(self):
-        """Read mpv stderr for diagnostics."""
-        print("[mpv] stderr reader started")
-        while self._running:
-            try:
-                if not self._process or not self._process.stderr:
-                    break
-                line = self._process.stderr.readline()
-                if line:
-                    msg = line.decode('utf-8', errors='ignore').strip()
-                    if msg:
-                        print(f"[mpv] {msg}")
-                else:
-                    # Empty line might mean process ended
-                    if self._process.poll() is not None:
-                        print(f"[mpv] Process exited with code: {self._process.poll()}")
-                        break
-            except Exception as e:
-                print(f"[mpv] stderr reader error: {e}")
-                break
-        print("[mpv] stderr reader stopped")
-                
     def stop(self):
         """Stop mpv."""
         self._running = False
         self._ready = False
+        self._config_sent = False  # A restarted mpv needs SPS/PPS again
         
         with self._lock:
             self._frame_buffer.clear()
+        self._clear_write_queue()
+        self._await_idr = False
+        self._last_arrival = 0.0  # Keep the jitter stats, but not the restart gap
+        
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._writer_thread.join(timeout=1.0)
+        self._writer_thread = None
+        
+        self._player.stop()
+        self._process = None
         
-        if self._process:
-            try:
-                self._process.stdin.close()
-            except:
-                pass
-            try:
-                self._process.terminate()
-                self._process.wait(timeout=2.0)
-            except:
-                try:
-                    self._process.kill()
-                except:
-                    pass
-            self._process = None
-            
         print("[mpv] Stopped")
         
     # Compatibility methods for main_window.py
@@ -0,0 +1,125 @@
+"""
+GPU vendor detection shared by the external video players.
+
+The probe runs once per process; players map the vendor to their own
+hardware decoder options.
+
+Environment overrides (skip the probe entirely):
+    WOLFKRYPT_HW_ACCEL=nvidia|intel|amd|dxva2|none
+    WOLFKRYPT_HW_ACCEL_DISABLE=1   (same as WOLFKRYPT_HW_ACCEL=none)
+"""
+
+import ctypes
+import functools
+import os
+import platform
+from typing import Optional
+
+NVIDIA = 'nvidia'
+INTEL = 'intel'
+AMD = 'amd'
+DXVA2 = 'dxva2'
+NONE = 'none'
+
+HW_ACCEL_CHOICES = (NVIDIA, INTEL, AMD, DXVA2, NONE)
+
+_IS_WINDOWS = platform.system() == 'Windows'
+
+
+def hw_accel_override() -> Optional[str]:
+    """Return the operator-selected acceleration from the environment, if any."""
+    if os.environ.get('WOLFKRYPT_HW_ACCEL_DISABLE') == '1':
+        return NONE
+    value = os.environ.get('WOLFKRYPT_HW_ACCEL', '').strip().lower()
+    if not value:
+        return None
+    if value not in HW_ACCEL_CHOICES:
+        print(f"[GPU] Ignoring unknown WOLFKRYPT_HW_ACCEL={value!r}")
+        return None
+    return value
+
+
+# Device class GUID of display adapters
+_DISPLAY_CLASS_KEY = r'SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}'
+
+
+def _query_registry_gpu_names() -> str:
+    """Return the lowercased DriverDesc of every display adapter in the registry."""
+    import winreg
+    
+    names = []
+    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _DISPLAY_CLASS_KEY) as class_key:
+        index = 0
+        while True:
+            try:
+                subkey_name = winreg.EnumKey(class_key, index)
+            except OSError:
+                break  # No more subkeys
+            index += 1
+            try:
+                with winreg.OpenKey(class_key, subkey_name) as subkey:
+                    names.append(str(winreg.QueryValueEx(subkey, 'DriverDesc')[0]))
+            except OSError:
+                continue  # 'Properties' and similar entries have no DriverDesc
+    return ' '.join(names).lower()
+
+
+def _query_gpu_names() -> str:
+    """Return the lowercased names of all display adapters (Windows only)."""
+    try:
+        names = _query_registry_gpu_names()
+        if names:
+            return names
+    except OSError as e:
+        print(f"[GPU] Registry lookup failed: {e}")
+    
+    from ctypes import wintypes
+    
+    class DISPLAY_DEVICEW(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('DeviceName', wintypes.WCHAR * 32),
+            ('DeviceString', wintypes.WCHAR * 128),
+            ('StateFlags', wintypes.DWORD),
+            ('DeviceID', wintypes.WCHAR * 128),
+            ('DeviceKey', wintypes.WCHAR * 128),
+        ]
+    
+    names = []
+    device = DISPLAY_DEVICEW()
+    device.cb = ctypes.sizeof(device)
+    index = 0
+    # EnumDisplayDevicesW is an in-process user32 call, unlike spawning wmic
+    while ctypes.windll.user32.EnumDisplayDevicesW(None, index, ctypes.byref(device), 0):
+        names.append(device.DeviceString)
+        index += 1
+    return ' '.join(names).lower()
+
+
+@functools.lru_cache(maxsize=1)
+def detect_gpu_vendor() -> Optional[str]:
+    """
+    Detect the GPU vendor.
+    
+    Returns:
+        NVIDIA, INTEL, AMD, or None if unknown or not on Windows.
+    """
+    if not _IS_WINDOWS:
+        return None
+    
+    try:
+        gpu_info = _query_gpu_names()
+    except Exception as e:
+        print(f"[GPU] Detection failed: {e}")
+        return None
+    
+    if 'nvidia' in gpu_info:
+        print("[GPU] NVIDIA GPU detected")
+        return NVIDIA
+    elif 'intel' in gpu_info:
+        print("[GPU] Intel GPU detected")
+        return INTEL
+    elif 'amd' in gpu_info or 'radeon' in gpu_info:
+        print("[GPU] AMD GPU detected")
+        return AMD
+    return None
@@ -6,12 +6,15 @@ for real-time H.264 streaming with hardware acceleration.
 """
 
 import os
+import queue
 import shutil
 import subprocess
 import threading
 from pathlib import Path
 from typing import Optional
 
+from src.render.player_process import PlayerProcess
+
 
 class MPVBridge:
     """
@@ -43,7 +46,8 @@ class MPVBridge:
         '--vo=direct3d',          # Use Direct3D (not GPU/Vulkan)
         '--video-sync=desync',
         '--framedrop=no',
-        '--vd-lavc-threads=1',
+        '--vd-lavc-threads=0',  # All cores for software fallback...
+        '--vd-lavc-o=thread_type=slice',  # ...without frame-threading delay
         '--demuxer-thread=no',
         
         # Window
@@ -58,13 +62,16 @@ class MPVBridge:
         '--no-input-default-bindings',
         '--no-audio',
         
-        # Verbose logging
-        '--msg-level=all=warn,vd=v,vo=v',
+        # Warnings and errors only (verbose vd/vo logs flood the stderr reader)
+        '--msg-level=all=warn',
         
         # Stdin
         '-',
     ]
     
+    # Pending writes before write() applies back-pressure
+    WRITE_QUEUE_SIZE = 64
+    
     def __init__(self, mpv_path: Optional[str] = None):
         """
         Initialize the MPV bridge.
@@ -73,9 +80,11 @@ class MPVBridge:
             mpv_path: Path to mpv executable. If None, searches PATH.
         """
         self._mpv_path = mpv_path or self._find_mpv()
+        self._player = PlayerProcess('MPV')
         self._process: Optional[subprocess.Popen] = None
         self._running = False
-        self._stderr_thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._write_queue: queue.Queue = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
         
     def _find_mpv(self) -> Optional[str]:
         """Find MPV executable."""
@@ -114,23 +123,19 @@ class MPVBridge:
         try:
             cmd = [self._mpv_path] + self.MPV_LOW_LATENCY_FLAGS
             
-            self._process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                bufsize=0,  # Unbuffered
-            )
+            # Unbuffered 1 MiB stdin pipe; stderr is printed for diagnostics
+            self._process = self._player.start(cmd)
             
             self._running = True
             print(f"[MPVBridge] Started (PID: {self._process.pid})")
             
-            # Start stderr reader for diagnostics
-            self._stderr_thread = threading.Thread(
-                target=self._read_stderr,
+            # Pipe writes happen off the caller's (USB) thread
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop,
+                name="MPV_Writer",
                 daemon=True
             )
-            self._stderr_thread.start()
+            self._writer_thread.start()
             
             return True
             
@@ -148,17 +153,43 @@ class MPVBridge:
         Returns:
             True if successful, False on error.
         """
-        if not self._running or not self._process or not self._process.stdin:
+        process = self._process
+        if not self._running or not process or not process.stdin:
             return False
         
+        # Queue for the writer thread. Only blocks once WRITE_QUEUE_SIZE writes
+        # are pending: dropping NALs from a live H.264 stream corrupts decoding
         try:
-            self._process.stdin.write(data)
-            # Don't flush every write - let OS buffer handle it
-            return True
-        except (BrokenPipeError, OSError) as e:
-            print(f"[MPVBridge] Write error: {e}")
-            self._running = False
+            self._write_queue.put(data, timeout=1.0)
+        except queue.Full:
+            print("[MPVBridge] Write queue stalled, dropping data")
             return False
+        return True
+    
+    def _writer_loop(self):
+        """Writer thread - sends everything queued to stdin in one write."""
+        get = self._write_queue.get
+        get_nowait = self._write_queue.get_nowait
+        # The process outlives this thread: stop() joins it before teardown
+        write = self._player.write
+        while self._running:
+            try:
+                batch = [get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                # Scatter-gather write straight from the queued buffers
+                write(batch)
+            except (BrokenPipeError, OSError) as e:
+                print(f"[MPVBridge] Write error: {e}")
+                self._running = False
+                break
     
     def flush(self):
         """Flush the stdin buffer."""
@@ -168,41 +199,18 @@ class MPVBridge:
             except Exception:
                 pass
     
-    def _read_stderr(self):
-        """Read MPV stderr for diagnostics."""
-        while self._running and self._process:
-            try:
-                line = self._process.stderr.readline()
-                if line:
-                    msg = line.decode('utf-8', errors='ignore').strip()
-                    if msg:
-                        # Show all messages for debugging
-                        print(f"[MPV] {msg}")
-                else:
-                    if self._process.poll() is not None:
-                        print(f"[MPVBridge] Process exited: {self._process.poll()}")
-                        break
-            except Exception:
-                break
-    
     def stop(self):
         """Stop the MPV subprocess."""
         self._running = False
         
-        if self._process:
-            try:
-                self._process.stdin.close()
-            except Exception:
-                pass
-            try:
-                self._process.terminate()
-                self._process.wait(timeout=2.0)
-            except Exception:
-                try:
-                    self._process.kill()
-                except Exception:
-                    pass
-            self._process = None
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._writer_thread.join(timeout=1.0)
+        self._writer_thread = None
+        with self._write_queue.mutex:
+            self._write_queue.queue.clear()
+        
+        self._player.stop()
+        self._process = None
         
         print("[MPVBridge] Stopped")
     
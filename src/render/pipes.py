@@ -0,0 +1,137 @@
+"""
+Subprocess pipe helpers for the external video players.
+
+A 1 MiB stdin pipe absorbs USB bursts (e.g. large IDR frames) without
+blocking the writer. Linux pipes are grown with F_SETPIPE_SZ after
+spawning; on Windows the pipe is created with the larger size up front.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Optional, Tuple
+
+PIPE_BUFFER_SIZE = 1 << 20
+
+_HAS_WRITEV = hasattr(os, 'writev')
+
+
+def _create_windows_pipe() -> Optional[Tuple[int, int]]:
+    """Create a Windows pipe with a PIPE_BUFFER_SIZE buffer as (read_fd, write_fd)."""
+    try:
+        import _winapi
+        import msvcrt
+        read_handle, write_handle = _winapi.CreatePipe(None, PIPE_BUFFER_SIZE)
+        return msvcrt.open_osfhandle(read_handle, 0), msvcrt.open_osfhandle(write_handle, 0)
+    except Exception as e:
+        print(f"[Pipes] Large pipe unavailable, using default: {e}")
+        return None
+
+
+def grow_pipe_buffer(fd: int):
+    """Grow a Linux pipe buffer to PIPE_BUFFER_SIZE; silently ignored elsewhere."""
+    try:
+        import fcntl
+        fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def popen_large_stdin(cmd: list, bufsize: int = -1, **kwargs) -> subprocess.Popen:
+    """
+    Start cmd with stdin=PIPE, using a PIPE_BUFFER_SIZE pipe where supported.
+
+    Args:
+        cmd: Command line.
+        bufsize: Same meaning as for subprocess.Popen (0 = unbuffered).
+        **kwargs: Passed through to subprocess.Popen.
+    """
+    fds = _create_windows_pipe() if sys.platform == 'win32' else None
+    if fds is None:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, bufsize=bufsize, **kwargs)
+        grow_pipe_buffer(process.stdin.fileno())
+        return process
+
+    read_fd, write_fd = fds
+    try:
+        process = subprocess.Popen(cmd, stdin=read_fd, bufsize=bufsize, **kwargs)
+    except Exception:
+        os.close(write_fd)
+        raise
+    finally:
+        # The child holds its own inherited copy of the read end
+        os.close(read_fd)
+    process.stdin = open(write_fd, 'wb', buffering=bufsize)
+    return process
+
+
+def _emit(lines: list):
+    """Decode buffered log lines (bytes), write them in one call and clear the list."""
+    if lines:
+        sys.stdout.write(b''.join(lines).decode('utf-8', errors='ignore'))
+        sys.stdout.flush()
+        lines.clear()
+
+
+def drain_stderr(stream, tag: str, keep_running: Callable[[], bool],
+                 print_interval: float = 0.0):
+    """
+    Print a child's stderr until EOF, reading it in chunks.
+
+    Each os.read() wakeup handles every line available so far and prints
+    them with a single write, instead of one readline() + print() per line.
+    Lines stay bytes until then and are decoded once per batch. With a
+    print_interval, batches are held back until that many seconds have
+    passed since the last print.
+    """
+    fd = stream.fileno()
+    prefix = f"[{tag}] ".encode()
+    tail = b''
+    out = []
+    last_emit = time.monotonic()
+    while keep_running():
+        try:
+            data = os.read(fd, 4096)
+        except OSError:
+            break
+        if not data:
+            break
+        lines = (tail + data).split(b'\n')
+        tail = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if line:
+                out.append(prefix + line + b'\n')
+        if out:
+            now = time.monotonic()
+            if now - last_emit >= print_interval:
+                _emit(out)
+                last_emit = now
+    _emit(out)
+
+
+def write_all(fd: int, buffers) -> None:
+    """
+    Write a sequence of buffers to fd in order, retrying partial writes.
+
+    os.write/os.writev release the GIL for the syscall. Where writev exists
+    the buffers leave in one call without being concatenated first; on
+    Windows they are joined once and written with os.write.
+    """
+    if not _HAS_WRITEV:
+        data = buffers[0] if len(buffers) == 1 else b''.join(buffers)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        return
+
+    views = [memoryview(data) for data in buffers]
+    while views:
+        written = os.writev(fd, views)
+        # Discard fully written buffers and trim a partially written one
+        while views and written >= views[0].nbytes:
+            written -= views[0].nbytes
+            del views[0]
+        if written:
+            views[0] = views[0][written:]
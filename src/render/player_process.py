@@ -0,0 +1,107 @@
+"""
+Subprocess lifecycle shared by the external video players.
+
+MPVBridge, FFplayBridge and FFplayVideo each run a player that reads
+H.264 from stdin. PlayerProcess owns spawning it with a large stdin pipe,
+draining its stderr and shutting it down, so pipe-level changes are made
+in one place.
+"""
+
+import subprocess
+import threading
+from typing import Optional
+
+from src.render.pipes import drain_stderr, popen_large_stdin, write_all
+
+
+class PlayerProcess:
+    """A player subprocess fed through stdin, with its stderr printed under a tag."""
+
+    def __init__(self, tag: str, print_interval: float = 0.0):
+        """
+        Args:
+            tag: Prefix for the player's stderr lines, e.g. 'mpv'.
+            print_interval: Minimum seconds between stderr prints (0 = every read).
+        """
+        self._tag = tag
+        self._print_interval = print_interval
+        self._process: Optional[subprocess.Popen] = None
+        self._stdin_fd: Optional[int] = None
+        self._stderr_thread: Optional[threading.Thread] = None
+
+    def start(self, cmd: list, bufsize: int = 0) -> subprocess.Popen:
+        """
+        Spawn cmd with a large stdin pipe and start printing its stderr.
+
+        Args:
+            cmd: Command line.
+            bufsize: stdin buffering, as for subprocess.Popen (0 = unbuffered).
+
+        Raises:
+            OSError: If the player cannot be started.
+        """
+        process = popen_large_stdin(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=bufsize,
+        )
+        self._process = process
+        self._stdin_fd = process.stdin.fileno()
+
+        self._stderr_thread = threading.Thread(
+            target=self._read_stderr,
+            args=(process,),
+            name=f"{self._tag}_Stderr",
+            daemon=True
+        )
+        self._stderr_thread.start()
+        return process
+
+    @property
+    def process(self) -> Optional[subprocess.Popen]:
+        return self._process
+
+    @property
+    def stdin_fd(self) -> Optional[int]:
+        """Raw stdin fd, for writes that bypass the Python file object."""
+        return self._stdin_fd
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code, or None while the player is running."""
+        return self._process.poll() if self._process else None
+
+    def write(self, buffers) -> None:
+        """Write a sequence of buffers to the player's stdin fd in one call."""
+        write_all(self._stdin_fd, buffers)
+
+    def _read_stderr(self, process: subprocess.Popen):
+        drain_stderr(
+            process.stderr,
+            self._tag,
+            lambda: self._process is process,
+            self._print_interval
+        )
+        if process.poll() is not None:
+            print(f"[{self._tag}] Process exited with code: {process.poll()}")
+
+    def stop(self):
+        """Close stdin and terminate the player, killing it if it does not exit."""
+        process = self._process
+        self._process = None
+        self._stdin_fd = None
+        if not process:
+            return
+
+        try:
+            process.stdin.close()
+        except Exception:
+            pass
+        try:
+            process.terminate()
+            process.wait(timeout=2.0)
+        except Exception:
+            try:
+                process.kill()
+            except Exception:
+                pass
@@ -6,9 +6,11 @@ with hardware acceleration. Supports mobile aspect ratios and fullscreen toggle.
 """
 
 import ctypes
-import queue
 import threading
-from typing import Optional, Tuple
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
 
 try:
     import sdl2
@@ -31,9 +33,16 @@ class SDLVideoWindow:
     - Dynamic resolution updates
     """
     
+    # Longest the idle event loop sleeps before re-checking for work
+    IDLE_WAIT_MS = 8
+    
+    # Minimum seconds between repeats of a per-frame error message
+    ERROR_PRINT_INTERVAL = 1.0
+    
     def __init__(self, title: str = "Wolfkrypt Mirror"):
         """Initialize the SDL video window."""
         self._title = title
+        self._title_bytes = title.encode('utf-8')
         
         # Default to mobile portrait size (will be updated from SPS)
         self._video_width = 1080
@@ -45,18 +54,40 @@ class SDLVideoWindow:
         
         self._window = None
         self._renderer = None
-        self._texture = None
+        # Two streaming textures used alternately, so a frame is uploaded into
+        # one while the renderer may still be reading the other
+        self._textures: list = []
+        self._tex_idx = 0
+        self._last_yuv = None  # Last presented buffer object, to skip re-presenting it
+        
+        # Plane sizes of the current texture size, set in _create_texture
+        self._y_size = 0
+        self._uv_size = 0
+        self._frame_size = 0
+        
+        # Aspect-preserving destination of the video in the window, updated
+        # on resize; clearing is only needed when it leaves bars uncovered
+        self._dst_rect = sdl2.SDL_Rect() if SDL2_AVAILABLE else None
+        self._dst_covers = True
         self._texture_width = 0
         self._texture_height = 0
         
         self._running = False
         self._initialized = False
+        self._init_done = threading.Event()  # Set once _run() succeeds or gives up
         self._fullscreen = False
         
         self._thread: Optional[threading.Thread] = None
-        self._frame_queue: queue.Queue = queue.Queue(maxsize=3)
+        # Latest-frame slot: a newer frame overwrites one not yet displayed
+        self._latest_frame: Optional[Tuple[bytes, int, int]] = None
+        self._frame_lock = threading.Lock()
+        self._wake_event = None
         self._lock = threading.Lock()
         self._pending_resize: Optional[Tuple[int, int]] = None
+        self._last_error_time = 0.0
+        
+        # Reused by set_video_size, which runs again on every resolution change
+        self._display_bounds = sdl2.SDL_Rect() if SDL2_AVAILABLE else None
         
     @property
     def is_running(self) -> bool:
@@ -68,7 +99,7 @@ class SDLVideoWindow:
         self._video_height = height
         
         # Get desktop resolution using SDL
-        display_bounds = sdl2.SDL_Rect()
+        display_bounds = self._display_bounds
         if sdl2.SDL_GetDisplayBounds(0, ctypes.byref(display_bounds)) == 0:
             desktop_w = display_bounds.w
             desktop_h = display_bounds.h
@@ -109,14 +140,12 @@ class SDLVideoWindow:
             return True
             
         self._running = True
+        self._init_done.clear()
         self._thread = threading.Thread(target=self._run, name="SDL_Video", daemon=True)
         self._thread.start()
         
-        # Wait for initialization
-        timeout = 2.0
-        while timeout > 0 and not self._initialized:
-            threading.Event().wait(0.1)
-            timeout -= 0.1
+        # Wait for initialization (returns as soon as the SDL thread signals)
+        self._init_done.wait(timeout=2.0)
             
         return self._initialized
         
@@ -130,7 +159,7 @@ class SDLVideoWindow:
                 
             # Create resizable window (not fullscreen)
             self._window = sdl2.SDL_CreateWindow(
-                self._title.encode('utf-8'),
+                self._title_bytes,
                 sdl2.SDL_WINDOWPOS_CENTERED,
                 sdl2.SDL_WINDOWPOS_CENTERED,
                 self._window_width,
@@ -163,10 +192,26 @@ class SDLVideoWindow:
             renderer_name = info.name.decode('utf-8') if info.name else 'unknown'
             print(f"[SDLVideo] Window: {self._window_width}x{self._window_height}, Renderer: {renderer_name}")
             
+            # User event pushed by update_frame to wake SDL_WaitEventTimeout
+            wake_type = sdl2.SDL_RegisterEvents(1)
+            if wake_type != 0xFFFFFFFF:
+                wake_event = sdl2.SDL_Event()
+                wake_event.type = wake_type
+                self._wake_event = wake_event
+                
             self._initialized = True
+            self._init_done.set()
             
-            # Event loop
+            # Event loop; per-iteration callables and the event pointer are
+            # bound to locals once
             event = sdl2.SDL_Event()
+            event_ref = ctypes.byref(event)
+            poll_event = sdl2.SDL_PollEvent
+            wait_event = sdl2.SDL_WaitEventTimeout
+            handle_event = self._handle_event
+            display_frame = self._display_frame
+            frame_lock = self._frame_lock
+            idle_wait_ms = self.IDLE_WAIT_MS
             while self._running:
                 # Handle pending resize
                 if self._pending_resize:
@@ -175,38 +220,48 @@ class SDLVideoWindow:
                     sdl2.SDL_SetWindowSize(self._window, w, h)
                     
                 # Handle SDL events
-                while sdl2.SDL_PollEvent(ctypes.byref(event)):
-                    if event.type == sdl2.SDL_QUIT:
-                        self._running = False
-                        break
-                    elif event.type == sdl2.SDL_WINDOWEVENT:
-                        if event.window.event == sdl2.SDL_WINDOWEVENT_CLOSE:
-                            self._running = False
-                            break
-                    elif event.type == sdl2.SDL_KEYDOWN:
-                        # F11 for fullscreen toggle
-                        if event.key.keysym.sym == sdl2.SDLK_F11:
-                            self._toggle_fullscreen()
-                        # ESC to exit fullscreen
-                        elif event.key.keysym.sym == sdl2.SDLK_ESCAPE and self._fullscreen:
-                            self._toggle_fullscreen()
-                    elif event.type == sdl2.SDL_MOUSEBUTTONDOWN:
-                        # Double-click for fullscreen
-                        if event.button.clicks == 2:
-                            self._toggle_fullscreen()
-                            
+                while self._running and poll_event(event_ref):
+                    handle_event(event)
+                    
                 # Display frame if available
-                try:
-                    frame = self._frame_queue.get_nowait()
-                    self._display_frame(frame)
-                except queue.Empty:
-                    sdl2.SDL_Delay(1)
+                with frame_lock:
+                    frame = self._latest_frame
+                    self._latest_frame = None
+                if frame is not None:
+                    display_frame(frame)
+                elif wait_event(event_ref, idle_wait_ms):
+                    # Sleep until input or a new frame instead of spinning
+                    handle_event(event)
                     
         except Exception as e:
             print(f"[SDLVideo] Error: {e}")
         finally:
             self._cleanup()
+            self._init_done.set()
             
+    def _handle_event(self, event):
+        """Handle one SDL event on the SDL thread."""
+        if event.type == sdl2.SDL_QUIT:
+            self._running = False
+        elif event.type == sdl2.SDL_WINDOWEVENT:
+            # Resized/exposed: the next frame must be presented even if unchanged
+            self._last_yuv = None
+            if event.window.event == sdl2.SDL_WINDOWEVENT_CLOSE:
+                self._running = False
+            elif event.window.event == sdl2.SDL_WINDOWEVENT_SIZE_CHANGED:
+                self._recompute_dst_rect()
+        elif event.type == sdl2.SDL_KEYDOWN:
+            # F11 for fullscreen toggle
+            if event.key.keysym.sym == sdl2.SDLK_F11:
+                self._toggle_fullscreen()
+            # ESC to exit fullscreen
+            elif event.key.keysym.sym == sdl2.SDLK_ESCAPE and self._fullscreen:
+                self._toggle_fullscreen()
+        elif event.type == sdl2.SDL_MOUSEBUTTONDOWN:
+            # Double-click for fullscreen
+            if event.button.clicks == 2:
+                self._toggle_fullscreen()
+                
     def _toggle_fullscreen(self):
         """Toggle between fullscreen and windowed mode."""
         if self._fullscreen:
@@ -218,39 +273,94 @@ class SDLVideoWindow:
             self._fullscreen = True
             print("[SDLVideo] Fullscreen mode (F11 or ESC to exit)")
             
+    def _destroy_textures(self):
+        """Destroy the streaming textures (caller holds the lock)."""
+        for texture in self._textures:
+            sdl2.SDL_DestroyTexture(texture)
+        self._textures = []
+        self._last_yuv = None
+        self._texture_width = 0
+        self._texture_height = 0
+        self._frame_size = 0
+        
     def _create_texture(self, width: int, height: int):
-        """Create or recreate the YUV texture."""
+        """Create or recreate the pair of YUV textures."""
         with self._lock:
-            if self._texture:
-                sdl2.SDL_DestroyTexture(self._texture)
-                
-            self._texture = sdl2.SDL_CreateTexture(
-                self._renderer,
-                sdl2.SDL_PIXELFORMAT_IYUV,
-                sdl2.SDL_TEXTUREACCESS_STREAMING,
-                width, height
-            )
+            self._destroy_textures()
             
-            if self._texture:
+            textures = []
+            for _ in range(2):
+                texture = sdl2.SDL_CreateTexture(
+                    self._renderer,
+                    sdl2.SDL_PIXELFORMAT_IYUV,
+                    sdl2.SDL_TEXTUREACCESS_STREAMING,
+                    width, height
+                )
+                if not texture:
+                    break
+                textures.append(texture)
+                
+            if len(textures) == 2:
+                self._textures = textures
+                self._tex_idx = 0
                 self._texture_width = width
                 self._texture_height = height
-                print(f"[SDLVideo] Texture: {width}x{height}")
+                self._y_size = width * height
+                self._uv_size = (width // 2) * (height // 2)
+                self._frame_size = self._y_size + 2 * self._uv_size
+                print(f"[SDLVideo] Textures: 2x {width}x{height}")
+                self._recompute_dst_rect()
             else:
-                print(f"[SDLVideo] Failed to create texture")
+                for texture in textures:
+                    sdl2.SDL_DestroyTexture(texture)
+                self._report_error(f"Failed to create texture: {sdl2.SDL_GetError()}")
                 
-    def update_frame(self, yuv_data: bytes, width: int, height: int):
-        """Queue a YUV420P frame for display."""
+    def _recompute_dst_rect(self):
+        """Fit the video into the renderer output, keeping its aspect ratio."""
+        out_w = ctypes.c_int()
+        out_h = ctypes.c_int()
+        if not self._texture_width or sdl2.SDL_GetRendererOutputSize(
+                self._renderer, ctypes.byref(out_w), ctypes.byref(out_h)) < 0:
+            return
+            
+        out_w = out_w.value
+        out_h = out_h.value
+        scale = min(out_w / self._texture_width, out_h / self._texture_height)
+        w = round(self._texture_width * scale)
+        h = round(self._texture_height * scale)
+        # Within a pixel of the output: stretch to cover it and skip the clear
+        self._dst_covers = abs(out_w - w) <= 1 and abs(out_h - h) <= 1
+        if self._dst_covers:
+            w, h = out_w, out_h
+            
+        rect = self._dst_rect
+        rect.x = (out_w - w) // 2
+        rect.y = (out_h - h) // 2
+        rect.w = w
+        rect.h = h
+        
+    def can_accept_frame(self) -> bool:
+        """Return True if a new frame would be displayed rather than overwrite a pending one."""
+        return self._latest_frame is None
+        
+    def update_frame(self, yuv_data: Union[bytes, bytearray, memoryview], width: int, height: int):
+        """
+        Queue a YUV420P frame for display.
+        
+        The buffer is uploaded without being copied and is kept to detect
+        repeated frames, so it must not be modified after this call.
+        """
         if not self._running or not self._initialized:
             return
             
-        try:
-            self._frame_queue.put_nowait((yuv_data, width, height))
-        except queue.Full:
-            try:
-                self._frame_queue.get_nowait()
-                self._frame_queue.put_nowait((yuv_data, width, height))
-            except queue.Empty:
-                pass
+        with self._frame_lock:
+            was_empty = self._latest_frame is None
+            self._latest_frame = (yuv_data, width, height)
+            
+        # One wake-up per pending frame; SDL_PushEvent is thread-safe
+        wake_event = self._wake_event
+        if was_empty and wake_event is not None:
+            sdl2.SDL_PushEvent(ctypes.byref(wake_event))
                 
     def _display_frame(self, frame_data: Tuple[bytes, int, int]):
         """Display a YUV frame."""
@@ -264,57 +374,95 @@ class SDLVideoWindow:
             if not self._fullscreen:
                 self.set_video_size(width, height)
                 
-            if not self._texture:
+            if not self._textures:
                 return
                 
-        # Calculate plane sizes
-        y_size = width * height
-        uv_size = y_size // 4
-        
-        expected = y_size + uv_size * 2
-        if len(yuv_data) < expected:
+        if len(yuv_data) < self._frame_size:
             return
             
-        # Extract planes
-        y_plane = yuv_data[:y_size]
-        u_plane = yuv_data[y_size:y_size + uv_size]
-        v_plane = yuv_data[y_size + uv_size:y_size + uv_size * 2]
+        # The same buffer handed in again needs no upload or present; contents
+        # are not compared, as a full-frame memcmp would cost every frame
+        if yuv_data is self._last_yuv:
+            return
         
-        # Convert to ctypes arrays (SDL needs C pointers, not Python bytes)
-        y_array = (ctypes.c_ubyte * len(y_plane)).from_buffer_copy(y_plane)
-        u_array = (ctypes.c_ubyte * len(u_plane)).from_buffer_copy(u_plane)
-        v_array = (ctypes.c_ubyte * len(v_plane)).from_buffer_copy(v_plane)
+        # Textures are only created and destroyed on this (the SDL) thread,
+        # so the per-frame path needs no lock
+        texture = self._textures[self._tex_idx]
+        if not self._upload_frame(texture, yuv_data, width, height):
+            return
+            
+        if not self._dst_covers:
+            sdl2.SDL_RenderClear(self._renderer)
+        sdl2.SDL_RenderCopy(self._renderer, texture, None, ctypes.byref(self._dst_rect))
+        sdl2.SDL_RenderPresent(self._renderer)
+        self._tex_idx ^= 1
+        self._last_yuv = yuv_data
+            
+    def _upload_frame(self, texture, yuv_data: bytes, width: int, height: int) -> bool:
+        """
+        Copy a YUV420P frame straight into the locked streaming texture.
         
-        with self._lock:
-            if not self._texture:
-                return
-                
-            result = sdl2.SDL_UpdateYUVTexture(
-                self._texture, None,
-                ctypes.cast(y_array, ctypes.POINTER(ctypes.c_ubyte)), width,
-                ctypes.cast(u_array, ctypes.POINTER(ctypes.c_ubyte)), width // 2,
-                ctypes.cast(v_array, ctypes.POINTER(ctypes.c_ubyte)), width // 2
+        SDL_UpdateYUVTexture would stage the planes in its own buffer before
+        the driver copy; writing into the memory returned by SDL_LockTexture
+        makes this the only copy. Planes are copied with NumPy so the
+        per-row pitch padding is handled in C, not a Python loop.
+        """
+        pixels = ctypes.c_void_p()
+        pitch = ctypes.c_int()
+        if sdl2.SDL_LockTexture(texture, None, ctypes.byref(pixels), ctypes.byref(pitch)) < 0:
+            self._report_error(f"Failed to lock texture: {sdl2.SDL_GetError()}")
+            return False
+            
+        try:
+            y_pitch = pitch.value
+            uv_pitch = y_pitch // 2
+            uv_width = width // 2
+            uv_height = height // 2
+            y_size = self._y_size
+            uv_size = self._uv_size
+            
+            # IYUV layout in the locked region: Y, then U, then V, each pitch-padded
+            total = y_pitch * height + 2 * uv_pitch * uv_height
+            dst = np.ctypeslib.as_array(
+                ctypes.cast(pixels, ctypes.POINTER(ctypes.c_ubyte)), shape=(total,)
             )
+            src = np.frombuffer(yuv_data, dtype=np.uint8, count=self._frame_size)
             
-            if result < 0:
-                return
+            if y_pitch == width:
+                # No padding: one contiguous copy of all three planes
+                dst[:] = src
+                return True
                 
-            sdl2.SDL_RenderClear(self._renderer)
-            sdl2.SDL_RenderCopy(self._renderer, self._texture, None, None)
-            sdl2.SDL_RenderPresent(self._renderer)
+            u_offset = y_pitch * height
+            v_offset = u_offset + uv_pitch * uv_height
+            dst[:u_offset].reshape(height, y_pitch)[:, :width] = \
+                src[:y_size].reshape(height, width)
+            dst[u_offset:v_offset].reshape(uv_height, uv_pitch)[:, :uv_width] = \
+                src[y_size:y_size + uv_size].reshape(uv_height, uv_width)
+            dst[v_offset:].reshape(uv_height, uv_pitch)[:, :uv_width] = \
+                src[y_size + uv_size:].reshape(uv_height, uv_width)
+            return True
+        finally:
+            sdl2.SDL_UnlockTexture(texture)
+            
+    def _report_error(self, message: str):
+        """Print a render-path error at most once per ERROR_PRINT_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_error_time >= self.ERROR_PRINT_INTERVAL:
+            self._last_error_time = now
+            print(f"[SDLVideo] {message}")
             
     def _cleanup(self):
         """Clean up SDL resources."""
         with self._lock:
-            if self._texture:
-                sdl2.SDL_DestroyTexture(self._texture)
-                self._texture = None
+            self._destroy_textures()
             if self._renderer:
                 sdl2.SDL_DestroyRenderer(self._renderer)
                 self._renderer = None
             if self._window:
                 sdl2.SDL_DestroyWindow(self._window)
                 self._window = None
+            self._wake_event = None
                 
         sdl2.SDL_Quit()
         self._initialized = False
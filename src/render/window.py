@@ -49,26 +49,24 @@ class VideoWindow(QWidget):
         if frame is None:
             return
         
-        height, width, channels = frame.shape
-        bytes_per_line = channels * width
+        height, width, _ = frame.shape
         
-        # Convert numpy array to QImage
+        # Wrap the decoder's RGB24 array in place; Format_RGB888 is its native
+        # channel order, so Qt needs no channel swap
         qimage = QImage(
             frame.data,
             width,
             height,
-            bytes_per_line,
+            frame.strides[0],
             QImage.Format.Format_RGB888
         )
         
-        # Scale to fit while maintaining aspect ratio
-        scaled_pixmap = QPixmap.fromImage(qimage).scaled(
-            self._video_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
+        # The label scales its contents to fit when painting
+        # (setScaledContents), so no separate CPU rescale per frame.
+        # NoFormatConversion skips the RGB888 -> RGB32 pass of fromImage().
+        self._video_label.setPixmap(
+            QPixmap.fromImage(qimage, Qt.ImageConversionFlag.NoFormatConversion)
         )
-        
-        self._video_label.setPixmap(scaled_pixmap)
     
     def clear(self):
         """Clear the video display."""
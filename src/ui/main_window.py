@@ -4,7 +4,8 @@ Main window for Wolfkrypt Host application.
 Uses the new StreamBridge (MPV subprocess) for low-latency video streaming.
 """
 
-import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -12,7 +13,7 @@ from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QStatusBar, QMessageBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QObject
+from PyQt6.QtCore import Q_ARG, QMetaObject, Qt, QTimer, pyqtSlot
 
 # Use absolute imports for PyInstaller compatibility
 from src.core import AoaHost, Authenticator
@@ -22,22 +23,21 @@ from src.media import AudioDecoder
 from src.render import AudioPlayer
 
 
-class StatusSignal(QObject):
-    """Signal for thread-safe status updates."""
-    update = pyqtSignal(str)
-
-
 class MainWindow(QMainWindow):
     """Main application window."""
     
+    STATUS_COALESCE_MS = 50
+    
     def __init__(self):
         super().__init__()
         
         # Core components
         self._aoa_host = AoaHost()
         self._authenticator = Authenticator()
-        self._audio_decoder = AudioDecoder()
         self._audio_player = AudioPlayer()
+        # Decoded audio is resampled to the player's rate, so a stream rate
+        # change never reopens the output device
+        self._audio_decoder = AudioDecoder(output_rate=self._audio_player.sample_rate)
         
         # Stream bridge (replaces StreamPipeline)
         self._bridge: Optional[StreamBridge] = None
@@ -45,9 +45,17 @@ class MainWindow(QMainWindow):
         # State
         self._running = False
         
-        # Status signal for thread-safe updates
-        self._status_signal = StatusSignal()
-        self._status_signal.update.connect(self._update_status)
+        # One persistent worker for blocking connect work, reused across
+        # reconnects instead of spawning a thread per click
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Connect")
+        
+        # Status-bar text is coalesced: bursts of messages repaint at most
+        # once per STATUS_COALESCE_MS, showing the latest one
+        self._pending_status: Optional[str] = None
+        self._status_timer = QTimer(self)
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(self.STATUS_COALESCE_MS)
+        self._status_timer.timeout.connect(self._flush_status)
         
         self._setup_ui()
         self._setup_callbacks()
@@ -94,16 +102,11 @@ class MainWindow(QMainWindow):
     
     def _setup_callbacks(self):
         """Set up component callbacks."""
-        self._aoa_host.set_status_callback(
-            lambda msg: self._status_signal.update.emit(msg)
-        )
+        self._aoa_host.set_status_callback(self._post_status)
         self._audio_decoder.set_sample_callback(self._handle_audio_samples)
     
     def _handle_audio_samples(self, samples, sample_rate: int):
-        """Handle decoded audio samples."""
-        if sample_rate != self._audio_player._sample_rate:
-            print(f"[Audio] Updating sample rate: {self._audio_player._sample_rate} -> {sample_rate}")
-            self._audio_player.set_sample_rate(sample_rate)
+        """Handle decoded audio samples (already at the player's rate)."""
         self._audio_player.play(samples)
     
     def _load_key(self):
@@ -133,39 +136,49 @@ class MainWindow(QMainWindow):
         self._connect_btn.setEnabled(False)
         self._status_label.setText("Connecting...")
         
-        # Initialize and connect in background
-        def connect_thread():
-            if not self._aoa_host.initialize():
-                self._status_signal.update.emit(f"Init failed: {self._aoa_host.last_error}")
-                return
-            
-            if not self._aoa_host.connect_to_device():
-                self._status_signal.update.emit(f"Connect failed: {self._aoa_host.last_error}")
-                return
-            
-            # Create the stream bridge (MPV-based)
-            self._bridge = StreamBridge(
-                aoa_host=self._aoa_host,
-                authenticator=self._authenticator,
-                status_callback=lambda msg: self._status_signal.update.emit(msg)
-            )
-            
-            # Set up audio handling
-            self._bridge.set_audio_callback(self._audio_decoder.decode)
-            self._bridge.set_config_callback(self._handle_config)
-            
-            # Start audio player
-            self._audio_player.start()
-            
-            # Start the bridge
-            self._running = True
-            if not self._bridge.start():
-                self._status_signal.update.emit("Failed to start stream bridge")
-                return
-            
-            self._status_signal.update.emit("Connected - Streaming via MPV")
-        
-        threading.Thread(target=connect_thread, daemon=True).start()
+        # Initialize and connect in background, on the window's worker
+        self._worker.submit(self._connect_worker).add_done_callback(self._on_connect_done)
+    
+    def _connect_worker(self):
+        """Initialize USB, connect and start the stream bridge (worker thread)."""
+        if not self._aoa_host.initialize():
+            self._post_status(f"Init failed: {self._aoa_host.last_error}")
+            return
+        
+        if not self._aoa_host.connect_to_device():
+            self._post_status(f"Connect failed: {self._aoa_host.last_error}")
+            return
+        
+        # Create the stream bridge (MPV-based)
+        self._bridge = StreamBridge(
+            aoa_host=self._aoa_host,
+            authenticator=self._authenticator,
+            status_callback=self._post_status
+        )
+        
+        # Set up audio handling
+        self._bridge.set_audio_callback(self._audio_decoder.decode)
+        self._bridge.set_config_callback(self._handle_config)
+        
+        # Start audio player
+        self._audio_player.start()
+        
+        # Start the bridge
+        self._running = True
+        if not self._bridge.start():
+            self._post_status("Failed to start stream bridge")
+            return
+        
+        self._post_status("Connected - Streaming via MPV")
+    
+    def _on_connect_done(self, future: Future):
+        """Report an exception raised by _connect_worker (the executor would keep it)."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            traceback.print_exception(error)
+            self._post_status(f"Connect error: {error}")
     
     def _handle_config(self, subtype: int, config_data: bytes):
         """Handle config packets from the bridge."""
@@ -187,9 +200,20 @@ class MainWindow(QMainWindow):
         self._disconnect_btn.setEnabled(False)
         self._status_label.setText("Disconnected")
     
+    def _post_status(self, message: str):
+        """Queue a status update onto the main thread (callable from any thread)."""
+        QMetaObject.invokeMethod(
+            self, '_update_status', Qt.ConnectionType.QueuedConnection, Q_ARG(str, message)
+        )
+    
+    @pyqtSlot(str)
     def _update_status(self, message: str):
         """Update status (called on main thread)."""
-        self.statusBar().showMessage(message)
+        self._pending_status = message
+        if not self._status_timer.isActive():
+            self._status_timer.start()
+        
+        # Button state follows every message, so none is lost to coalescing
         if "Connected" in message or "Streaming" in message:
             self._connect_btn.setEnabled(False)
             self._disconnect_btn.setEnabled(True)
@@ -199,6 +223,12 @@ class MainWindow(QMainWindow):
             self._disconnect_btn.setEnabled(False)
             self._status_label.setText("Error")
     
+    def _flush_status(self):
+        """Show the latest coalesced status message."""
+        if self._pending_status is not None:
+            self.statusBar().showMessage(self._pending_status)
+            self._pending_status = None
+    
     def closeEvent(self, event):
         """Handle window close."""
         self._running = False
@@ -208,5 +238,6 @@ class MainWindow(QMainWindow):
         
         self._aoa_host.disconnect()
         self._audio_player.stop()
+        self._worker.shutdown(wait=False, cancel_futures=True)
         
         event.accept()
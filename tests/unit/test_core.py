@@ -29,6 +29,83 @@ def test_parse_header():
     assert header.length == 1024
 
 
+def test_parse_header_from_offset():
+    """Test in-place header parsing from a buffer offset."""
+    from src.core.protocol import parse_header_from, create_header, PacketType
+    
+    buffer = bytearray(b'\x00\x00' + create_header(PacketType.AUDIO, 7))
+    header = parse_header_from(memoryview(buffer), 2)
+    
+    assert header is not None
+    assert header.type == PacketType.AUDIO
+    assert header.length == 7
+    assert parse_header_from(buffer, 3) is None  # Truncated
+    assert parse_header_from(b'\x7f\x00\x00\x00\x01', 0) is None  # Unknown type
+
+
+def test_dropping_queue_evicts_oldest():
+    """Test that a full DroppingQueue evicts its oldest items first."""
+    from src.core.dropping_queue import DroppingQueue
+    
+    queue = DroppingQueue(maxsize=3)
+    evicted = [queue.put(item) for item in range(5)]
+    
+    assert evicted == [False, False, False, True, True]
+    assert [queue.get() for _ in range(3)] == [2, 3, 4]
+    assert queue.get() is None
+
+
+def test_dropping_queue_discard_before():
+    """Test that discard_before keeps the first matching item at the head."""
+    from src.core.dropping_queue import DroppingQueue
+    
+    queue = DroppingQueue(maxsize=5)
+    for item in ('p1', 'p2', 'idr1', 'p3', 'idr2'):
+        queue.put(item)
+    
+    assert queue.discard_before(lambda item: item.startswith('idr'))
+    assert queue.qsize() == 3
+    assert queue.get() == 'idr1'
+    
+    # Without a match the queue is left untouched
+    assert not queue.discard_before(lambda item: item == 'missing')
+    assert [queue.get() for _ in range(2)] == ['p3', 'idr2']
+
+
+def test_write_all_larger_than_pipe():
+    """Test write_all over a pipe with buffers larger than its capacity."""
+    import os
+    import threading
+    from src.render.pipes import write_all
+    
+    buffers = [bytes([index]) * (256 * 1024) for index in range(1, 4)]
+    read_fd, write_fd = os.pipe()
+    received = bytearray()
+    
+    def drain():
+        while chunk := os.read(read_fd, 65536):
+            received.extend(chunk)
+    
+    reader = threading.Thread(target=drain)
+    reader.start()
+    try:
+        write_all(write_fd, buffers)
+    finally:
+        os.close(write_fd)
+        reader.join(timeout=5)
+        os.close(read_fd)
+    
+    assert received == b''.join(buffers)
+
+
+def test_parse_cpu_list():
+    """Test parsing of sysfs CPU lists."""
+    from src.core.affinity import _parse_cpu_list
+    
+    assert _parse_cpu_list("0-3,8,10-11\n") == {0, 1, 2, 3, 8, 10, 11}
+    assert _parse_cpu_list("") == set()
+
+
 def test_authenticator_init():
     """Test authenticator initialization."""
     from src.core.auth import Authenticator
@@ -0,0 +1,44 @@
+"""Basic unit tests for media module."""
+
+
+def test_find_nal_units():
+    """Test Annex B NAL unit splitting with mixed start codes."""
+    from src.media.h264 import NAL_PPS, NAL_SPS, nal_type, split_nal_units
+
+    data = b'\x00\x00\x00\x01\x67\xAA' + b'\x00\x00\x01\x68\xBB' + b'\x00\x00\x00\x01\x65\xCC'
+    assert split_nal_units(data) == [b'\x67\xAA', b'\x68\xBB', b'\x65\xCC']
+    assert nal_type(data) == NAL_SPS
+    assert nal_type(b'\x00\x00\x01\x68') == NAL_PPS
+
+
+def test_contains_vcl():
+    """Test detection of picture slices among non-VCL NAL units."""
+    from src.media.h264 import contains_vcl
+
+    assert not contains_vcl(b'\x00\x00\x00\x01\x09\xF0' + b'\x00\x00\x00\x01\x06\x05')
+    assert contains_vcl(b'\x00\x00\x00\x01\x09\xF0' + b'\x00\x00\x00\x01\x41\x9A')
+
+
+def test_has_idr():
+    """Test IDR detection anywhere in the buffer."""
+    from src.media.h264 import has_idr
+
+    assert has_idr(b'\x00\x00\x00\x01\x09\xF0' + b'\x00\x00\x00\x01\x65\x88')
+    assert not has_idr(b'\x00\x00\x00\x01\x41\x9A\x00\x00\x01')
+
+
+def test_has_nal_type():
+    """Test NAL type lookup past the first unit."""
+    from src.media.h264 import NAL_PPS, NAL_SPS, has_nal_type
+
+    assert has_nal_type(b'\x00\x00\x00\x01\x41\x9A' + b'\x00\x00\x01\x68', (NAL_PPS,))
+    assert not has_nal_type(b'\x00\x00\x00\x01\x41\x9A', (NAL_SPS, NAL_PPS))
+
+
+def test_is_disposable():
+    """Test that only buffers of non-reference slices are disposable."""
+    from src.media.h264 import is_disposable
+
+    assert is_disposable(b'\x00\x00\x00\x01\x09\xF0' + b'\x00\x00\x00\x01\x01\x9A')
+    assert not is_disposable(b'\x00\x00\x00\x01\x41\x9A')
+    assert not is_disposable(b'\x00\x00\x00\x01\x01\x9A' + b'\x00\x00\x00\x01\x65\x88')